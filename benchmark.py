@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+HypeBot - Offline client benchmark
+Starts the mock Hyperliquid API in-process and measures HyperliquidClient
+throughput and latency against it
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+import numpy as np
+from hyperliquid_client import HyperliquidClient
+from rate_limiter import WeightedRateLimiter
+from mock_hyperliquid import MockHyperliquidServer, SyntheticMarket
+
+async def run_benchmark(endpoint: str, total_requests: int, concurrency: int,
+                        latency_ms: float, error_rate: float, seed: int) -> Dict:
+    """Fire ``total_requests`` client calls with ``concurrency`` workers"""
+    server = MockHyperliquidServer(
+        market=SyntheticMarket(seed=seed),
+        port=0,
+        latency=latency_ms / 1000,
+        error_rate=error_rate,
+        weight_per_minute=None,
+        seed=seed
+    )
+    await server.start()
+
+    # Measure the transport, not the exchange budget or response reuse
+    client = HyperliquidClient(
+        base_url=server.base_url,
+        max_concurrent_requests=concurrency,
+        rate_limiter=WeightedRateLimiter(capacity=1e12, refill_per_second=1e12),
+        coalesce_window=0
+    )
+    coins = server.market.coins
+    calls = {
+        'price': lambda i: client.get_asset_price(coins[i % len(coins)]),
+        'book': lambda i: client.get_l2_snapshot(coins[i % len(coins)]),
+        'books': lambda i: client.get_l2_snapshots(coins),
+        'mids': lambda i: client.get_all_mids(),
+        'ctxs': lambda i: client.get_asset_contexts(force_refresh=True),
+        'candles': lambda i: client.get_candles(coins[i % len(coins)], '1m', limit=500)
+    }
+    call = calls[endpoint]
+    latencies: List[float] = []
+    failures = 0
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request, failures
+        while next_request < total_requests:
+            i = next_request
+            next_request += 1
+            started = time.perf_counter()
+            result = await call(i)
+            latencies.append(time.perf_counter() - started)
+            if result is None:
+                failures += 1
+
+    await client.get_market_info()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    await client.close()
+    await server.stop()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'endpoint': endpoint,
+        'requests': total_requests,
+        'concurrency': concurrency,
+        'failures': failures,
+        'elapsed_seconds': elapsed,
+        'requests_per_second': total_requests / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p90_ms': float(np.percentile(latencies_ms, 90)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'max_ms': float(latencies_ms.max()),
+        'upstream_requests': client.upstream_request_count,
+        'retries': client.retry_count
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HyperliquidClient against the local mock API")
+    parser.add_argument('--endpoint', choices=['price', 'book', 'books', 'mids', 'ctxs', 'candles'], default='price')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Simulated server latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Simulated 500 rate")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args.endpoint, args.requests, args.concurrency,
+                                       args.latency_ms, args.error_rate, args.seed))
+    for key, value in result.items():
+        print(f"{key:>20}: {value:.2f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+if __name__ == "__main__":
+    main()
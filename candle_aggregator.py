@@ -0,0 +1,226 @@
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import logging
+from config import AGGREGATOR_INTERVALS, AGGREGATOR_CAPACITY
+from hyperliquid_client import CANDLE_INTERVAL_MS, CANDLE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+BAR_INTERVAL_MS = dict(CANDLE_INTERVAL_MS, **{'1s': 1000})
+
+BarCallback = Callable[[str, str, Dict], None]
+
+class BarSeries:
+    """Fixed-capacity ring of OHLCV bars at one resolution, plus the open bar
+
+    Columns match HyperliquidClient.get_candles(): 'time' is the bar open
+    in epoch ms, 'volume' sums tick sizes (0 for mids) and 'trades' counts
+    ticks. A bar that saw no ticks closes flat at the previous close.
+    """
+
+    def __init__(self, interval_ms: int, capacity: int = AGGREGATOR_CAPACITY):
+        self.interval_ms = interval_ms
+        self.capacity = capacity
+        self.columns = {
+            'time': np.zeros(capacity, dtype=np.int64),
+            'open': np.zeros(capacity),
+            'high': np.zeros(capacity),
+            'low': np.zeros(capacity),
+            'close': np.zeros(capacity),
+            'volume': np.zeros(capacity),
+            'trades': np.zeros(capacity, dtype=np.int64)
+        }
+        self.closed_count = 0
+        self.late_count = 0
+
+        # Open bar
+        self.bar_start: Optional[int] = None
+        self.open = self.high = self.low = self.close = 0.0
+        self.volume = 0.0
+        self.trades = 0
+
+    def advance(self, now_ms: int) -> List[Dict]:
+        """Close every bar that ended at or before ``now_ms``; returns them oldest first"""
+        if self.bar_start is None or now_ms < self.bar_start + self.interval_ms:
+            return []
+        elapsed = (now_ms - self.bar_start) // self.interval_ms
+        closed = [self._close_bar()]
+        # Empty bars in between close flat; only the last ``capacity`` can be kept anyway
+        empty = elapsed - 1
+        if empty > self.capacity:
+            self.bar_start += (empty - self.capacity) * self.interval_ms
+            empty = self.capacity
+        for _ in range(empty):
+            closed.append(self._close_bar())
+        return closed
+
+    def _close_bar(self) -> Dict:
+        if not self.trades:
+            self.open = self.high = self.low = self.close
+        slot = self.closed_count % self.capacity
+        bar = {
+            'time': self.bar_start,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'trades': self.trades
+        }
+        for column in CANDLE_COLUMNS:
+            self.columns[column][slot] = bar[column]
+        self.closed_count += 1
+        self.bar_start += self.interval_ms
+        self.volume = 0.0
+        self.trades = 0
+        return bar
+
+    def update(self, price: float, timestamp_ms: int, size: float = 0.0) -> List[Dict]:
+        """Add a tick; returns any bars it closed"""
+        if self.bar_start is None:
+            self.bar_start = timestamp_ms - timestamp_ms % self.interval_ms
+        elif timestamp_ms < self.bar_start:
+            self.late_count += 1
+            return []
+        closed = self.advance(timestamp_ms)
+        if not self.trades:
+            self.open = self.high = self.low = price
+        else:
+            self.high = max(self.high, price)
+            self.low = min(self.low, price)
+        self.close = price
+        self.volume += size
+        self.trades += 1
+        return closed
+
+    def get_bars(self, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Most recent closed bars as column arrays, oldest first"""
+        available = min(self.closed_count, self.capacity)
+        count = available if count is None else min(count, available)
+        slots = np.arange(self.closed_count - count, self.closed_count) % self.capacity
+        return {column: values[slots] for column, values in self.columns.items()}
+
+    def current_bar(self) -> Optional[Dict]:
+        """The bar still being built, if any ticks have arrived"""
+        if self.bar_start is None:
+            return None
+        return {'time': self.bar_start, 'open': self.open, 'high': self.high, 'low': self.low,
+                'close': self.close, 'volume': self.volume, 'trades': self.trades}
+
+class CandleAggregator:
+    """Builds multi-resolution OHLCV bars per coin from live ticks
+
+    Feed it {coin: price} batches; bars are kept in preallocated
+    BarSeries rings. A background task closes bars on their time boundary
+    even when no tick arrives, and every completed bar is published to the
+    matching subscribers. While ``hold()`` returns True (e.g. a stream gap
+    that may still be backfilled) no bar is closed: incoming ticks are
+    buffered and applied in time order once the hold ends, so late ticks
+    still land in their own bar.
+    """
+
+    def __init__(self, coins: Optional[Iterable[str]] = None,
+                 intervals: Iterable[str] = AGGREGATOR_INTERVALS,
+                 capacity: int = AGGREGATOR_CAPACITY,
+                 hold: Optional[Callable[[], bool]] = None):
+        self.coins = set(coins) if coins is not None else None
+        self.intervals = list(intervals)
+        self.capacity = capacity
+        self.hold = hold
+        self.series: Dict[Tuple[str, str], BarSeries] = {}
+        self._subscribers: List[Tuple[Optional[str], Optional[str], BarCallback]] = []
+        self._held: List[Tuple[int, Dict[str, float]]] = []
+        self._clock_task: Optional[asyncio.Task] = None
+        self.tick_count = 0
+        self.bar_count = 0
+
+    def subscribe(self, callback: BarCallback, coin: Optional[str] = None, interval: Optional[str] = None):
+        """Call ``callback(coin, interval, bar)`` for each completed bar (None matches any)"""
+        self._subscribers.append((coin, interval, callback))
+
+    def _series_for(self, coin: str) -> List[Tuple[str, BarSeries]]:
+        result = []
+        for interval in self.intervals:
+            series = self.series.get((coin, interval))
+            if series is None:
+                series = self.series[(coin, interval)] = BarSeries(BAR_INTERVAL_MS[interval], self.capacity)
+            result.append((interval, series))
+        return result
+
+    def on_tick_batch(self, mids: Dict[str, float], timestamp: Optional[float] = None):
+        """Add one message's prices, observed at ``timestamp`` (epoch seconds, default now)"""
+        timestamp_ms = int((timestamp if timestamp is not None else time.time()) * 1000)
+        if self._is_held():
+            self._held.append((timestamp_ms, mids))
+            return
+        self._apply(mids, timestamp_ms)
+
+    def _apply(self, mids: Dict[str, float], timestamp_ms: int):
+        for coin, price in mids.items():
+            if self.coins is not None and coin not in self.coins:
+                continue
+            self.tick_count += 1
+            for interval, series in self._series_for(coin):
+                self._publish(coin, interval, series.update(price, timestamp_ms))
+
+    def advance(self, now: Optional[float] = None):
+        """Close bars whose interval has ended"""
+        if self._is_held():
+            return
+        now_ms = int((now if now is not None else time.time()) * 1000)
+        for (coin, interval), series in self.series.items():
+            self._publish(coin, interval, series.advance(now_ms))
+
+    def _is_held(self) -> bool:
+        """Whether bars must stay open; applies the ticks buffered meanwhile once a hold ends"""
+        if self.hold is not None and self.hold():
+            return True
+        if self._held:
+            held, self._held = self._held, []
+            # Stable sort: ticks with equal timestamps keep their arrival order
+            for timestamp_ms, mids in sorted(held, key=lambda item: item[0]):
+                self._apply(mids, timestamp_ms)
+        return False
+
+    def _publish(self, coin: str, interval: str, bars: List[Dict]):
+        for bar in bars:
+            self.bar_count += 1
+            for want_coin, want_interval, callback in self._subscribers:
+                if want_coin not in (None, coin) or want_interval not in (None, interval):
+                    continue
+                try:
+                    callback(coin, interval, bar)
+                except Exception as e:
+                    logger.error(f"Error in bar subscriber for {coin} {interval}: {e}")
+
+    def start(self):
+        """Start closing bars on time boundaries"""
+        if self._clock_task is None or self._clock_task.done():
+            self._clock_task = asyncio.create_task(self._run_clock())
+
+    def stop(self):
+        if self._clock_task is not None:
+            self._clock_task.cancel()
+
+    async def _run_clock(self):
+        step = min(BAR_INTERVAL_MS[interval] for interval in self.intervals) / 1000
+        while True:
+            # Wake just after the next boundary of the finest resolution
+            await asyncio.sleep(step - time.time() % step + 0.001)
+            self.advance()
+
+    def get_bars(self, coin: str, interval: str, count: Optional[int] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Most recent closed bars for a coin as column arrays, oldest first"""
+        series = self.series.get((coin, interval))
+        return series.get_bars(count) if series is not None else None
+
+    def get_status(self) -> Dict:
+        return {
+            'series': len(self.series),
+            'ticks': self.tick_count,
+            'bars': self.bar_count,
+            'held_batches': len(self._held),
+            'late_ticks': sum(series.late_count for series in self.series.values())
+        }
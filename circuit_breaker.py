@@ -0,0 +1,93 @@
+import time
+from typing import Dict, Optional
+import logging
+from config import CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_SECONDS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open"""
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are rejected for ``reset_timeout`` seconds. The next request
+    is then let through as a trial, and others are rejected until it
+    finishes: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str = "hyperliquid",
+                 failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.consecutive_failures = 0
+        self.open_count = 0
+        self.rejected_count = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpenError if requests should not be sent right now
+
+        Returns True if the caller's request is the half-open trial; it
+        must then call end_trial() once the request has finished.
+        """
+        state = self.state
+        if state == OPEN:
+            self.rejected_count += 1
+            retry_in = self.reset_timeout - (time.monotonic() - self._opened_at)
+            raise CircuitOpenError(f"Circuit '{self.name}' is open, retry in {retry_in:.0f}s")
+        if state == HALF_OPEN:
+            if self._trial_in_flight:
+                self.rejected_count += 1
+                raise CircuitOpenError(f"Circuit '{self.name}' is half-open, waiting for the trial request")
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def end_trial(self):
+        """Let the next request through as a trial if the circuit is still half-open"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        if self._state != CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self._state = CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self.open_count += 1
+                logger.warning(f"Circuit '{self.name}' opened after {self.consecutive_failures} failures")
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+
+    def get_status(self) -> Dict:
+        """Get breaker state and counters"""
+        seconds_until_retry: Optional[float] = None
+        if self.state == OPEN:
+            seconds_until_retry = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'open_count': self.open_count,
+            'rejected_count': self.rejected_count,
+            'trial_in_flight': self._trial_in_flight,
+            'seconds_until_retry': seconds_until_retry
+        }
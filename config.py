@@ -7,17 +7,98 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
-# Hyperliquid Configuration
-HYPERLIQUID_API_BASE = "https://api.hyperliquid.xyz"
-HYPERLIQUID_WS_URL = "wss://api.hyperliquid.xyz/ws"
+# Hyperliquid Configuration (override to point at mock_hyperliquid.py)
+HYPERLIQUID_API_BASE = os.getenv('HYPERLIQUID_API_BASE', "https://api.hyperliquid.xyz")
+HYPERLIQUID_WS_URL = os.getenv('HYPERLIQUID_WS_URL', "wss://api.hyperliquid.xyz/ws")
+
+# HTTP Connection Pool Configuration
+HTTP_MAX_CONNECTIONS = 10  # Total pooled connections to the Hyperliquid API
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 5  # Idle connections kept warm for reuse
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30.0  # Close idle connections after this long
+HTTP_TIMEOUT_SECONDS = 10.0  # Per-request timeout
+HTTP_MAX_CONCURRENT_REQUESTS = 8  # Max requests in flight at once
+HTTP_WARM_CONNECTIONS = 2  # Connections opened at startup and kept warm while idle
+HTTP_KEEPALIVE_PING_SECONDS = 20.0  # Idle time before a keep-alive request (below the keepalive expiry)
+BATCH_FETCH_CONCURRENCY = 4  # Max concurrent requests per multi-asset batch
+REQUEST_COALESCE_WINDOW_SECONDS = 1.0  # Reuse identical responses this fresh (0 disables)
+
+# Retry and Circuit Breaker Configuration
+RETRY_MAX_ATTEMPTS = 3  # Retries for failed info requests (after the first try)
+RETRY_BASE_DELAY_SECONDS = 0.5  # Backoff doubles from here, with full jitter
+RETRY_MAX_DELAY_SECONDS = 10.0  # Cap on backoff and on honored Retry-After
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5  # Consecutive failures before failing fast
+CIRCUIT_BREAKER_RESET_SECONDS = 30  # How long to fail fast before a trial request
+
+# Rate Limiting (Hyperliquid allows 1200 request weight per minute per IP)
+RATE_LIMIT_WEIGHT_PER_MINUTE = 1200
+RATE_LIMIT_MAX_WAIT_SECONDS = 10.0  # Shed requests that would queue longer than this
+
+# WebSocket Streaming Configuration
+ENABLE_PRICE_STREAM = True  # Stream allMids over WebSocket instead of polling
+WS_PING_INTERVAL_SECONDS = 30  # Heartbeat ping interval (server drops idle sockets after 60s)
+WS_RECONNECT_DELAY_SECONDS = 5  # Initial wait before reconnecting a dropped socket
+WS_RECONNECT_MAX_DELAY_SECONDS = 60  # Reconnect backoff cap
+STREAM_STALE_SECONDS = 10  # Streamed prices older than this fall back to REST
+ALL_MIDS_MAX_AGE_SECONDS = 5  # Cached allMids snapshot reused for this long before refetching
+PRICE_FALLBACK_MAX_AGE_SECONDS = 300  # Oldest last-known price served when every source fails
+STREAM_HEARTBEAT_TIMEOUT_SECONDS = 30  # Force a reconnect after this long without messages
+STREAM_GAP_BACKFILL_SECONDS = 60  # Backfill outages longer than this from candles
+STREAM_BACKFILL_INTERVAL = "1m"  # Candle interval used to fill stream gaps
+
+# Tick Conflation (between the stream and the analyzer)
+CONFLATION_INTERVAL_SECONDS = 1.0  # Forward at most one price per coin per interval
+CONFLATION_MIN_CHANGE_BPS = 1.0  # Drop ticks that moved less than this from the last forwarded price
+
+# Live Candle Aggregation
+AGGREGATOR_INTERVALS = ('1s', '1m', '5m', '1h')  # Bar resolutions built from streamed ticks
+AGGREGATOR_CAPACITY = 3600  # Closed bars kept per coin and resolution
+
+# Ingestion Worker Process
+ENABLE_INGESTION_PROCESS = False  # Run the WebSocket in a separate process (replaces the in-process stream)
+TICK_RING_CAPACITY = 65_536  # Ticks held in the shared-memory ring between the worker and the bot
+INGEST_POLL_INTERVAL_SECONDS = 0.1  # How often the bot drains new ticks from the ring
+
+# Local Order Book Configuration
+ENABLE_ORDER_BOOK = False  # Maintain a streamed L2 book for the tracked asset
+ORDER_BOOK_MAX_GAP_SECONDS = 5  # Resync from a REST snapshot after a longer update gap
+LIQUIDITY_DEPTH_BPS = 10  # Band around the mid used for depth and imbalance signals
+
+# Traffic Recording (for offline replay with traffic_recorder.py)
+RECORD_TRAFFIC = os.getenv('RECORD_TRAFFIC', '').lower() in ('1', 'true', 'yes')
+RECORDING_DIR = "recordings"  # Directory for gzip JSONL segment files
+RECORDING_SEGMENT_MAX_RECORDS = 100_000  # Rotate to a new segment after this many records
+
+# Request Metrics
+METRICS_EXPORT_PATH = os.getenv('METRICS_EXPORT_PATH')  # Prometheus textfile to write client metrics to (disabled if unset)
+METRICS_EXPORT_INTERVAL_SECONDS = 15  # How often the metrics textfile is rewritten
+
+# Historical Archive (written by download_history.py)
+HISTORY_ARCHIVE_DIR = "data/candles"  # Root of the Parquet candle archive
+
+# Tick Store (analyzer price history persisted across restarts; needs a persistent disk on Render)
+ENABLE_TICK_STORE = True  # Log analyzed prices to per-coin memory-mapped files
+TICK_STORE_DIR = "data/ticks"  # Directory for {coin}.ticks files
+TICK_STORE_MAX_RESTORE_AGE_SECONDS = 180_000  # Ignore stored history older than this at startup (100 x 30m bars)
+
+# State Database (SQLite in WAL mode; alert log, cooldowns and per-chat settings)
+ENABLE_STATE_DB = True  # Persist bot state so a restart picks up where it left off
+STATE_DB_PATH = "data/state.db"  # SQLite database file
+STATE_DB_COMMIT_INTERVAL_SECONDS = 0.5  # Group queued writes into one commit per interval
+STATE_DB_MAX_BATCH = 1000  # Commit early once this many writes are queued
+
+# Market Metadata Cache
+META_CACHE_TTL_SECONDS = 300  # Refresh the asset universe every 5 minutes
+ASSET_CTX_CACHE_TTL_SECONDS = 5  # Share one metaAndAssetCtxs snapshot per polling cycle
 
 # Price Alert Configuration
+TRACKED_ASSET = "SOL"  # Asset monitored for alerts
 TARGET_PRICE = 41.0
 STANDARD_DEVIATIONS = 2.0  # Number of standard deviations for alert
 UPDATE_INTERVAL_MINUTES = 30  # Regular monitoring every 30 minutes
 
 # Statistical Analysis
 PRICE_HISTORY_WINDOW = 100  # Number of price points to keep for analysis
+HISTORY_INTERVAL = "30m"  # Bar interval of the analyzer's price history (startup backfill and live bars)
 ALERT_THRESHOLD = 0.7  # Lowered threshold for more sensitive alerts (70% probability)
 
 # Telegram Alert Settings
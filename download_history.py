@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+HypeBot - Bulk candle history downloader
+Pulls candleSnapshot history for a set of coins and dates into a Parquet
+archive partitioned by interval, coin and day:
+
+    <out>/interval=1m/coin=SOL/date=2024-05-01/candles.parquet
+
+Finished days are recorded in <out>/_checkpoint.json, so an interrupted
+download resumes where it stopped. Requires pyarrow.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import logging
+from config import HISTORY_ARCHIVE_DIR, BATCH_FETCH_CONCURRENCY
+from hyperliquid_client import HyperliquidClient, CANDLE_INTERVAL_MS, CANDLE_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86_400_000
+CHECKPOINT_FILE = '_checkpoint.json'
+
+def partition_path(root: str, interval: str, coin: str, day: date) -> str:
+    return os.path.join(root, f"interval={interval}", f"coin={coin}", f"date={day.isoformat()}", "candles.parquet")
+
+def _day_start_ms(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp() * 1000)
+
+class Checkpoint:
+    """Completed (interval, coin, day) partitions and their row counts, saved atomically"""
+
+    def __init__(self, root: str):
+        self.path = os.path.join(root, CHECKPOINT_FILE)
+        self.completed: Dict[str, int] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.completed = json.load(f)
+
+    @staticmethod
+    def key(interval: str, coin: str, day: date) -> str:
+        return f"{interval}/{coin}/{day.isoformat()}"
+
+    def is_done(self, interval: str, coin: str, day: date) -> bool:
+        return self.key(interval, coin, day) in self.completed
+
+    def mark_done(self, interval: str, coin: str, day: date, rows: int):
+        self.completed[self.key(interval, coin, day)] = rows
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.completed, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def write_partition(path: str, candles: Dict[str, np.ndarray]):
+    """Write one day of candles atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.table({column: candles[column] for column in CANDLE_COLUMNS})
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+def load_history(root: str, coin: str, interval: str,
+                 start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """Read archived candles for a coin as column arrays, oldest first"""
+    coin_dir = os.path.join(root, f"interval={interval}", f"coin={coin}")
+    paths = []
+    if os.path.isdir(coin_dir):
+        for name in sorted(os.listdir(coin_dir)):
+            day = date.fromisoformat(name.split('=', 1)[1])
+            if (start is None or day >= start) and (end is None or day <= end):
+                path = os.path.join(coin_dir, name, "candles.parquet")
+                if os.path.exists(path):
+                    paths.append(path)
+    if not paths:
+        return {column: np.array([], dtype=np.int64 if column in ('time', 'trades') else np.float64)
+                for column in CANDLE_COLUMNS}
+    table = pa.concat_tables([pq.read_table(path) for path in paths])
+    return {column: table.column(column).to_numpy() for column in CANDLE_COLUMNS}
+
+async def download(client: HyperliquidClient, root: str, coins: List[str], interval: str,
+                   start: date, end: date, concurrency: int = BATCH_FETCH_CONCURRENCY) -> Dict:
+    """Download every missing (coin, day) partition between start and end inclusive"""
+    checkpoint = Checkpoint(root)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    jobs: List[Tuple[str, date]] = [(coin, day) for coin in coins for day in days
+                                    if not checkpoint.is_done(interval, coin, day)]
+    semaphore = asyncio.Semaphore(concurrency)
+    now_ms = int(time.time() * 1000)
+    result = {'partitions': len(coins) * len(days), 'skipped': len(coins) * len(days) - len(jobs),
+              'written': 0, 'empty': 0, 'failed': 0, 'rows': 0}
+
+    async def fetch_day(coin: str, day: date):
+        day_start = _day_start_ms(day)
+        day_end = min(day_start + DAY_MS, now_ms)
+        async with semaphore:
+            candles = await client.get_candles(coin, interval, start_time=day_start, end_time=day_end)
+        if candles is None:
+            result['failed'] += 1
+            return
+        # The API may hand back a bar from the previous day on the boundary
+        in_day = (candles['time'] >= day_start) & (candles['time'] < day_start + DAY_MS)
+        candles = {column: values[in_day] for column, values in candles.items()}
+        rows = len(candles['time'])
+        if rows:
+            write_partition(partition_path(root, interval, coin, day), candles)
+            result['written'] += 1
+            result['rows'] += rows
+        else:
+            result['empty'] += 1
+        # Today's partition is still filling up; fetch it again next run
+        if day_start + DAY_MS <= now_ms:
+            checkpoint.mark_done(interval, coin, day, rows)
+        logger.info(f"{coin} {interval} {day}: {rows} candles")
+
+    await asyncio.gather(*(fetch_day(coin, day) for coin, day in jobs))
+    return result
+
+def _parse_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Download Hyperliquid candle history into a partitioned Parquet archive")
+    parser.add_argument('--coins', nargs='+', required=True, help="Coins to download, e.g. SOL BTC")
+    parser.add_argument('--start', type=_parse_date, required=True, help="First day (YYYY-MM-DD, UTC)")
+    parser.add_argument('--end', type=_parse_date, default=datetime.now(timezone.utc).date(),
+                        help="Last day, inclusive (default: today)")
+    parser.add_argument('--interval', choices=list(CANDLE_INTERVAL_MS), default='1m')
+    parser.add_argument('--out', default=HISTORY_ARCHIVE_DIR, help="Archive root directory")
+    parser.add_argument('--concurrency', type=int, default=BATCH_FETCH_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+    if pq is None:
+        parser.error("pyarrow is required: pip install pyarrow")
+    if args.end < args.start:
+        parser.error("--end is before --start")
+    os.makedirs(args.out, exist_ok=True)
+
+    async def run() -> Dict:
+        async with HyperliquidClient() as client:
+            started = time.perf_counter()
+            result = await download(client, args.out, args.coins, args.interval,
+                                    args.start, args.end, args.concurrency)
+            result['elapsed_seconds'] = time.perf_counter() - started
+            return result
+
+    result = asyncio.run(run())
+    for key, value in result.items():
+        print(f"{key:>16}: {value:.2f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+if __name__ == "__main__":
+    main()
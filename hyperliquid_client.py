@@ -1,91 +1,688 @@
-import requests
+import asyncio
 import json
+import random
 import time
-from typing import Dict, List, Optional
+from email.utils import parsedate_to_datetime
+import httpx
+import numpy as np
+from typing import Any, Dict, List, NamedTuple, Optional
 import logging
+from config import (
+    HYPERLIQUID_API_BASE,
+    META_CACHE_TTL_SECONDS,
+    ASSET_CTX_CACHE_TTL_SECONDS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    HTTP_TIMEOUT_SECONDS,
+    HTTP_MAX_CONCURRENT_REQUESTS,
+    HTTP_WARM_CONNECTIONS,
+    HTTP_KEEPALIVE_PING_SECONDS,
+    REQUEST_COALESCE_WINDOW_SECONDS,
+    BATCH_FETCH_CONCURRENCY,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_MAX_DELAY_SECONDS,
+    HISTORY_INTERVAL
+)
+from rate_limiter import WeightedRateLimiter, RateLimitExceeded, request_weight, CANDLE_ITEMS_PER_EXTRA_WEIGHT
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from request_metrics import RequestMetrics, MetricSample
+from json_codec import loads, dumps, parse_decimals
+from order_book import L2Snapshot
 
 logger = logging.getLogger(__name__)
 
+# candleSnapshot intervals and their length in milliseconds
+CANDLE_INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 180_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '30m': 1_800_000,
+    '1h': 3_600_000,
+    '2h': 7_200_000,
+    '4h': 14_400_000,
+    '8h': 28_800_000,
+    '12h': 43_200_000,
+    '1d': 86_400_000,
+    '3d': 259_200_000,
+    '1w': 604_800_000,
+    '1M': 2_592_000_000
+}
+MAX_CANDLES_PER_REQUEST = 5000  # The API truncates larger candleSnapshot ranges
+CANDLE_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume', 'trades')
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def candles_to_columns(rows: List[Dict]) -> Dict[str, np.ndarray]:
+    """Convert candleSnapshot rows into OHLCV column arrays"""
+    return {
+        'time': np.array([row['t'] for row in rows], dtype=np.int64),
+        'open': parse_decimals([row['o'] for row in rows]),
+        'high': parse_decimals([row['h'] for row in rows]),
+        'low': parse_decimals([row['l'] for row in rows]),
+        'close': parse_decimals([row['c'] for row in rows]),
+        'volume': parse_decimals([row['v'] for row in rows]),
+        'trades': np.array([row.get('n', 0) for row in rows], dtype=np.int64)
+    }
+
+# metaAndAssetCtxs context fields, as (column name, API key)
+ASSET_CTX_FIELDS = (
+    ('funding', 'funding'),
+    ('open_interest', 'openInterest'),
+    ('mark_px', 'markPx'),
+    ('oracle_px', 'oraclePx'),
+    ('mid_px', 'midPx'),
+    ('prev_day_px', 'prevDayPx'),
+    ('day_ntl_vlm', 'dayNtlVlm'),
+    ('day_base_vlm', 'dayBaseVlm'),
+    ('premium', 'premium')
+)
+
+def asset_contexts_to_columns(meta: Dict, contexts: List[Dict]) -> Dict[str, np.ndarray]:
+    """Convert metaAndAssetCtxs contexts into column arrays in universe order
+
+    Missing values (e.g. no mid or premium for an illiquid asset) are NaN.
+    """
+    columns = {'name': np.array([asset['name'] for asset in meta.get('universe', [])])}
+    for column, key in ASSET_CTX_FIELDS:
+        columns[column] = parse_decimals([ctx.get(key) for ctx in contexts])
+    impact = [ctx.get('impactPxs') or (None, None) for ctx in contexts]
+    columns['impact_bid_px'] = parse_decimals([pxs[0] for pxs in impact])
+    columns['impact_ask_px'] = parse_decimals([pxs[1] for pxs in impact])
+    return columns
+
+class AssetInfo(NamedTuple):
+    """Position and sizing metadata for one asset in the universe"""
+    index: int
+    name: str
+    sz_decimals: int
+
 class HyperliquidClient:
-    def __init__(self):
-        self.base_url = "https://api.hyperliquid.xyz"
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, base_url: str = HYPERLIQUID_API_BASE,
+                 max_connections: int = HTTP_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                 timeout: float = HTTP_TIMEOUT_SECONDS,
+                 max_concurrent_requests: int = HTTP_MAX_CONCURRENT_REQUESTS,
+                 warm_connections: int = HTTP_WARM_CONNECTIONS,
+                 keepalive_ping_interval: float = HTTP_KEEPALIVE_PING_SECONDS,
+                 meta_cache_ttl: float = META_CACHE_TTL_SECONDS,
+                 asset_ctx_cache_ttl: float = ASSET_CTX_CACHE_TTL_SECONDS,
+                 rate_limiter: Optional[WeightedRateLimiter] = None,
+                 coalesce_window: float = REQUEST_COALESCE_WINDOW_SECONDS,
+                 max_retries: int = RETRY_MAX_ATTEMPTS,
+                 retry_base_delay: float = RETRY_BASE_DELAY_SECONDS,
+                 retry_max_delay: float = RETRY_MAX_DELAY_SECONDS,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 recorder=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.recorder = recorder
+        self.headers = {
             'Content-Type': 'application/json',
             'User-Agent': 'HypeBot/1.0'
-        })
-    
-    def get_market_info(self) -> Optional[Dict]:
+        }
+        self.session: Optional[httpx.AsyncClient] = None
+        self._request_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.rate_limiter = rate_limiter or WeightedRateLimiter()
+
+        # Single-flight state: identical requests share one upstream call
+        self.coalesce_window = coalesce_window
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._recent_responses: Dict[str, tuple] = {}
+        self.upstream_request_count = 0
+        self.coalesced_count = 0
+
+        # Retries with backoff, and a breaker to fail fast while the API is down
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.retry_count = 0
+        self.failed_request_count = 0
+
+        # Per-endpoint latency histograms, status codes, bytes and in-flight gauges,
+        # plus the rate limit budget and circuit state at export time
+        self.metrics = RequestMetrics()
+        self.metrics.add_collector(self._limit_samples)
+
+        # Warm connections and connection reuse tracking (via the httpx trace extension)
+        self.warm_connections = min(warm_connections, max_keepalive_connections)
+        self.keepalive_ping_interval = keepalive_ping_interval
+        self._keep_alive_task: Optional[asyncio.Task] = None
+        self._last_request_time = 0.0
+        self.http_request_count = 0
+        self.new_connection_count = 0
+        self.connection_setup_seconds = 0.0
+        self.keepalive_ping_count = 0
+
+        # Universe metadata cache and name -> AssetInfo index
+        self.meta_cache_ttl = meta_cache_ttl
+        self._meta: Optional[Dict] = None
+        self._meta_fetched_at = 0.0
+        self._asset_index: Dict[str, AssetInfo] = {}
+        self._meta_lock = asyncio.Lock()
+
+        # Per-cycle metaAndAssetCtxs snapshot shared by every consumer
+        self.asset_ctx_cache_ttl = asset_ctx_cache_ttl
+        self._asset_ctxs: Optional[Dict[str, np.ndarray]] = None
+        self._asset_ctxs_fetched_at = 0.0
+        self._asset_ctx_lock = asyncio.Lock()
+
+    def _get_session(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP session, creating it on first use"""
+        if self.session is None or self.session.is_closed:
+            self.session = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=httpx.Timeout(self.timeout)
+            )
+        return self.session
+
+    async def warm_up(self, connections: Optional[int] = None) -> int:
+        """Open pooled connections ahead of the first real request
+
+        Loads the universe metadata and sends concurrent lightweight
+        requests so ``connections`` sockets are connected (DNS, TCP and TLS
+        done) and parked in the pool. Returns the number of new connections.
+        """
+        connections = self.warm_connections if connections is None else connections
+        opened_before = self.new_connection_count
+        started = time.perf_counter()
+        await self.get_market_info()
+        if connections > 1:
+            await self._ping_connections(connections)
+        opened = self.new_connection_count - opened_before
+        logger.info(f"Warmed up {opened} API connections in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return opened
+
+    async def _ping_connections(self, connections: int):
+        """Send concurrent allMids requests, bypassing coalescing, one per connection"""
+        results = await asyncio.gather(
+            *(self._send_info_once({"type": "allMids"}) for _ in range(connections)),
+            return_exceptions=True
+        )
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.warning(f"{len(failures)} of {connections} keep-alive requests failed: {failures[0]!r}")
+
+    def start_keep_alive(self):
+        """Keep the warm connections open by pinging the API while otherwise idle"""
+        if self._keep_alive_task is None or self._keep_alive_task.done():
+            self._keep_alive_task = asyncio.create_task(self._keep_alive())
+
+    async def _keep_alive(self):
+        while True:
+            idle = time.monotonic() - self._last_request_time
+            if idle < self.keepalive_ping_interval:
+                await asyncio.sleep(self.keepalive_ping_interval - idle)
+                continue
+            self.keepalive_ping_count += 1
+            await self._ping_connections(max(self.warm_connections, 1))
+
+    def _trace_request(self):
+        """Build an httpx trace hook counting new connections and their setup time"""
+        connect_started = None
+
+        async def trace(event_name: str, info: Dict):
+            nonlocal connect_started
+            if event_name == 'connection.connect_tcp.started':
+                connect_started = time.perf_counter()
+            elif event_name.endswith('send_request_headers.started'):
+                self.http_request_count += 1
+                if connect_started is not None:
+                    self.new_connection_count += 1
+                    self.connection_setup_seconds += time.perf_counter() - connect_started
+        return trace
+
+    def get_connection_stats(self) -> Dict:
+        """Connection reuse ratio and average setup cost"""
+        requests = self.http_request_count
+        return {
+            'requests': requests,
+            'new_connections': self.new_connection_count,
+            'reuse_ratio': 1 - self.new_connection_count / requests if requests else None,
+            'avg_setup_ms': (self.connection_setup_seconds / self.new_connection_count * 1000
+                             if self.new_connection_count else None),
+            'keepalive_pings': self.keepalive_ping_count
+        }
+
+    async def close(self):
+        """Close the pooled HTTP session and release its connections"""
+        if self._keep_alive_task is not None:
+            self._keep_alive_task.cancel()
+            self._keep_alive_task = None
+        if self.session is not None and not self.session.is_closed:
+            await self.session.aclose()
+        self.session = None
+
+    async def __aenter__(self) -> "HyperliquidClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _post_info(self, payload: Dict, timeout: Optional[float] = None) -> Any:
+        """POST a request to the /info endpoint and return the decoded JSON body
+
+        Concurrent calls with the same payload await a single upstream
+        request, and a response younger than ``coalesce_window`` seconds is
+        returned without another request. Shared responses must be treated
+        as read-only.
+        """
+        key = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        if self.coalesce_window > 0:
+            recent = self._recent_responses.get(key)
+            if recent is not None and time.monotonic() - recent[0] < self.coalesce_window:
+                self.coalesced_count += 1
+                return recent[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send_info(payload, timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._on_request_done(key, done))
+        else:
+            self.coalesced_count += 1
+        # Shield so one caller being cancelled doesn't cancel the shared request
+        return await asyncio.shield(task)
+
+    def _on_request_done(self, key: str, task: asyncio.Task):
+        """Clear a finished single-flight request and cache its response"""
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self.coalesce_window <= 0:
+            return
+        now = time.monotonic()
+        self._recent_responses = {
+            cached_key: entry for cached_key, entry in self._recent_responses.items()
+            if now - entry[0] < self.coalesce_window
+        }
+        self._recent_responses[key] = (now, task.result())
+
+    async def _send_info(self, payload: Dict, timeout: Optional[float] = None) -> Any:
+        """Send an /info request upstream, retrying transient failures
+
+        Info requests are read-only, so timeouts, connection errors, 429s
+        and 5xx responses are retried with exponentially growing, fully
+        jittered delays (or the server's Retry-After). Every attempt passes
+        through the circuit breaker first.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                trial = self.circuit_breaker.before_request()
+            except CircuitOpenError:
+                self.failed_request_count += 1
+                raise
+            try:
+                result = await self._send_info_once(payload, timeout)
+            except RateLimitExceeded:
+                # Shed locally before reaching the API; not retried
+                self.failed_request_count += 1
+                raise
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                retryable = status == 429 or status >= 500
+                # Throttling means the API is up; only server errors trip the breaker
+                if status >= 500:
+                    self.circuit_breaker.record_failure()
+                delay = _parse_retry_after(e.response.headers.get('Retry-After'))
+                error = e
+            except httpx.TransportError as e:
+                retryable = True
+                self.circuit_breaker.record_failure()
+                delay = None
+                error = e
+            else:
+                self.circuit_breaker.record_success()
+                return result
+            finally:
+                if trial:
+                    self.circuit_breaker.end_trial()
+
+            if delay is None:
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+            if (not retryable or attempt == self.max_retries or delay > self.retry_max_delay or
+                    self.circuit_breaker.state == OPEN):
+                self.failed_request_count += 1
+                raise error
+            self.retry_count += 1
+            self.metrics.record_retry(payload.get('type', 'unknown'))
+            logger.warning(f"{payload.get('type')} request failed ({error!r}), "
+                           f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def _send_info_once(self, payload: Dict, timeout: Optional[float] = None) -> Any:
+        """Send one /info request attempt"""
+        session = self._get_session()
+        self.upstream_request_count += 1
+        await self.rate_limiter.acquire(request_weight(payload))
+        endpoint = payload.get('type', 'unknown')
+        async with self._request_semaphore:
+            self.metrics.request_started(endpoint)
+            started = time.perf_counter()
+            self._last_request_time = time.monotonic()
+            try:
+                response = await session.post(
+                    "/info",
+                    content=dumps(payload),
+                    timeout=timeout if timeout is not None else self.timeout,
+                    extensions={'trace': self._trace_request()}
+                )
+            except BaseException as e:
+                self.metrics.request_finished(endpoint, time.perf_counter() - started, type(e).__name__)
+                if self.recorder is not None and isinstance(e, httpx.TransportError):
+                    self.recorder.record_error(payload, e)
+                raise
+            self.metrics.request_finished(endpoint, time.perf_counter() - started,
+                                          str(response.status_code), len(response.content))
+        if self.recorder is not None:
+            self.recorder.record_info(payload, response.content, response.status_code,
+                                      response.headers.get('Retry-After'))
+        response.raise_for_status()
+        return loads(response.content)
+
+    def _meta_is_fresh(self) -> bool:
+        """Check whether the cached universe metadata is still within its TTL"""
+        return (self._meta is not None and
+                time.monotonic() - self._meta_fetched_at < self.meta_cache_ttl)
+
+    def _set_meta(self, meta: Dict):
+        """Store universe metadata and rebuild the asset name index"""
+        self._meta = meta
+        self._meta_fetched_at = time.monotonic()
+        self._asset_index = {
+            asset['name']: AssetInfo(index, asset['name'], int(asset.get('szDecimals', 0)))
+            for index, asset in enumerate(meta.get('universe', []))
+            if 'name' in asset
+        }
+
+    async def _get_meta(self, force_refresh: bool = False) -> Dict:
+        """Return cached universe metadata, refreshing it when stale"""
+        if not force_refresh and self._meta_is_fresh():
+            return self._meta
+        async with self._meta_lock:
+            # Another task may have refreshed while we waited for the lock
+            if not force_refresh and self._meta_is_fresh():
+                return self._meta
+            self._set_meta(await self._post_info({"type": "meta"}))
+            return self._meta
+
+    def invalidate_meta_cache(self):
+        """Drop cached universe metadata so the next lookup refetches it"""
+        self._meta = None
+        self._meta_fetched_at = 0.0
+
+    async def get_market_info(self, force_refresh: bool = False) -> Optional[Dict]:
         """Get market information for all assets"""
         try:
-            response = self.session.post(
-                f"{self.base_url}/info",
-                json={"type": "meta"}
-            )
-            response.raise_for_status()
-            return response.json()
+            return await self._get_meta(force_refresh)
         except Exception as e:
             logger.error(f"Error fetching market info: {e}")
             return None
-    
-    def get_asset_price(self, asset_name: str = "SOL") -> Optional[float]:
+
+    async def get_asset_info(self, asset_name: str) -> Optional[AssetInfo]:
+        """Look up an asset's universe index and size decimals"""
+        try:
+            await self._get_meta()
+        except Exception as e:
+            logger.error(f"Error fetching market info: {e}")
+            # Fall back to a stale index rather than failing the lookup
+        return self._asset_index.get(asset_name)
+
+    async def is_valid_asset(self, asset_name: str) -> bool:
+        """Check whether an asset is listed in the universe"""
+        return await self.get_asset_info(asset_name) is not None
+
+    def _asset_ctxs_are_fresh(self) -> bool:
+        return (self._asset_ctxs is not None and
+                time.monotonic() - self._asset_ctxs_fetched_at < self.asset_ctx_cache_ttl)
+
+    async def get_asset_contexts(self, force_refresh: bool = False) -> Optional[Dict[str, np.ndarray]]:
+        """Get funding, open interest, mark/oracle/mid price and volume for every asset
+
+        One metaAndAssetCtxs request returns column arrays (see
+        ASSET_CTX_FIELDS) aligned with the meta universe order, plus 'name'.
+        The snapshot is cached for ``asset_ctx_cache_ttl`` seconds so every
+        consumer in a polling cycle reads the same data; treat it as read-only.
+        """
+        if not force_refresh and self._asset_ctxs_are_fresh():
+            return self._asset_ctxs
+        try:
+            async with self._asset_ctx_lock:
+                if not force_refresh and self._asset_ctxs_are_fresh():
+                    return self._asset_ctxs
+                meta, contexts = await self._post_info({"type": "metaAndAssetCtxs"})
+                # The response carries the universe too; keep the index in step with it
+                self._set_meta(meta)
+                self._asset_ctxs = asset_contexts_to_columns(meta, contexts)
+                self._asset_ctxs_fetched_at = time.monotonic()
+                return self._asset_ctxs
+        except Exception as e:
+            logger.error(f"Error fetching asset contexts: {e}")
+            return None
+
+    async def get_asset_context(self, asset_name: str) -> Optional[Dict[str, float]]:
+        """Get one asset's row from the shared asset context snapshot"""
+        contexts = await self.get_asset_contexts()
+        info = self._asset_index.get(asset_name)
+        if contexts is None or info is None:
+            return None
+        return {column: float(values[info.index]) for column, values in contexts.items() if column != 'name'}
+
+    def invalidate_asset_contexts(self):
+        """Drop the cached asset context snapshot so the next call refetches it"""
+        self._asset_ctxs = None
+        self._asset_ctxs_fetched_at = 0.0
+
+    async def get_l2_book(self, asset_name: str) -> Optional[Dict]:
+        """Get the raw l2Book snapshot for an asset"""
+        try:
+            return await self._post_info({"type": "l2Book", "coin": asset_name})
+        except Exception as e:
+            logger.error(f"Error fetching order book for {asset_name}: {e}")
+            return None
+
+    async def get_l2_snapshot(self, asset_name: str) -> Optional[L2Snapshot]:
+        """Get the order book for an asset as an array-backed L2Snapshot"""
+        book_data = await self.get_l2_book(asset_name)
+        if not book_data:
+            return None
+        try:
+            return L2Snapshot.from_levels(book_data)
+        except Exception as e:
+            logger.error(f"Error parsing order book for {asset_name}: {e}")
+            return None
+
+    async def get_l2_snapshots(self, asset_names: List[str],
+                               max_concurrency: int = BATCH_FETCH_CONCURRENCY) -> Dict:
+        """Fetch order books for several assets concurrently
+
+        At most ``max_concurrency`` requests from the batch are in flight at
+        once. Returns {'books': {coin: L2Snapshot}, 'errors': {coin: message},
+        'elapsed_seconds': wall time}; one coin failing doesn't fail the batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        books: Dict[str, L2Snapshot] = {}
+        errors: Dict[str, str] = {}
+
+        async def fetch(asset_name: str):
+            async with semaphore:
+                try:
+                    book_data = await self._post_info({"type": "l2Book", "coin": asset_name})
+                    if not book_data:
+                        errors[asset_name] = "empty order book"
+                        return
+                    books[asset_name] = L2Snapshot.from_levels(book_data)
+                except Exception as e:
+                    errors[asset_name] = str(e) or type(e).__name__
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch(name) for name in dict.fromkeys(asset_names)))
+        elapsed = time.perf_counter() - started
+        if errors:
+            logger.warning(f"Order book batch: {len(books)} ok, {len(errors)} failed in {elapsed:.2f}s")
+        return {'books': books, 'errors': errors, 'elapsed_seconds': elapsed}
+
+    async def get_asset_price(self, asset_name: str = "SOL") -> Optional[float]:
         """Get current price for a specific asset (default: SOL)"""
         try:
-            # Get meta info first
-            meta_response = self.session.post(
-                f"{self.base_url}/info",
-                json={"type": "meta"}
-            )
-            meta_response.raise_for_status()
-            meta_data = meta_response.json()
-            
-            # Find the asset
-            asset_info = None
-            for asset in meta_data.get('universe', []):
-                if asset.get('name') == asset_name:
-                    asset_info = asset
-                    break
-            
-            if not asset_info:
+            # Validate against the cached universe (no request when warm)
+            if not await self.is_valid_asset(asset_name):
                 logger.error(f"Asset {asset_name} not found")
                 return None
-            
-            # Get current price
-            price_response = self.session.post(
-                f"{self.base_url}/info",
-                json={"type": "l2Book", "coin": asset_name}
-            )
-            price_response.raise_for_status()
-            price_data = price_response.json()
-            
-            # Extract mid price from order book
-            if price_data and 'levels' in price_data:
-                levels = price_data['levels']
-                if levels and len(levels) > 0:
-                    best_bid = float(levels[0][0]) if levels[0] else 0
-                    best_ask = float(levels[0][1]) if levels[0] else 0
-                    if best_bid > 0 and best_ask > 0:
-                        return (best_bid + best_ask) / 2
-            
-            return None
-            
+
+            # Get current price as the order book mid
+            price_data = await self._post_info({"type": "l2Book", "coin": asset_name})
+            return L2Snapshot.from_levels(price_data).mid
+
         except Exception as e:
             logger.error(f"Error fetching price for {asset_name}: {e}")
             return None
-    
-    def get_price_history(self, asset_name: str = "SOL", limit: int = 100) -> List[float]:
-        """Get recent price history for an asset"""
+
+    async def get_all_mids(self) -> Optional[Dict[str, float]]:
+        """Get mid prices for every asset in a single allMids request"""
         try:
-            # For Hyperliquid, we'll simulate price history by making multiple requests
-            # In a real implementation, you might want to use their websocket API
-            prices = []
-            for _ in range(min(limit, 10)):  # Limit to avoid rate limiting
-                price = self.get_asset_price(asset_name)
-                if price:
-                    prices.append(price)
-                time.sleep(0.1)  # Small delay between requests
-            
-            return prices
+            mids = await self._post_info({"type": "allMids"})
+            return {name: float(px) for name, px in mids.items()}
         except Exception as e:
-            logger.error(f"Error fetching price history: {e}")
-            return [] 
\ No newline at end of file
+            logger.error(f"Error fetching all mids: {e}")
+            return None
+
+    async def get_all_mids_array(self) -> Optional[np.ndarray]:
+        """Get all mid prices as an array aligned to the meta universe order
+
+        Assets without a quoted mid are NaN; use get_asset_info() to map
+        names to positions in the array.
+        """
+        mids = await self.get_all_mids()
+        if mids is None:
+            return None
+        meta = await self.get_market_info()
+        if meta is None:
+            return None
+        prices = np.full(len(meta.get('universe', [])), np.nan)
+        for name, info in self._asset_index.items():
+            if name in mids:
+                prices[info.index] = mids[name]
+        return prices
+
+    async def get_candles(self, asset_name: str = "SOL", interval: str = HISTORY_INTERVAL,
+                          start_time: Optional[int] = None, end_time: Optional[int] = None,
+                          limit: int = 100) -> Optional[Dict[str, np.ndarray]]:
+        """Get OHLCV candles from candleSnapshot as column arrays
+
+        Times are epoch milliseconds. Without a start_time the range covers
+        the last ``limit`` intervals. Ranges longer than one response are
+        paged through, oldest first.
+        """
+        try:
+            interval_ms = CANDLE_INTERVAL_MS[interval]
+            if end_time is None:
+                end_time = int(time.time() * 1000)
+            if start_time is None:
+                start_time = end_time - limit * interval_ms
+
+            rows: List[Dict] = []
+            cursor = start_time
+            while cursor < end_time:
+                batch = await self._post_info({
+                    "type": "candleSnapshot",
+                    "req": {
+                        "coin": asset_name,
+                        "interval": interval,
+                        "startTime": cursor,
+                        "endTime": end_time
+                    }
+                })
+                if not batch:
+                    break
+                self.rate_limiter.charge(len(batch) // CANDLE_ITEMS_PER_EXTRA_WEIGHT)
+                # Pages overlap on the boundary candle; keep only newer rows
+                if rows:
+                    batch = [row for row in batch if row['t'] > rows[-1]['t']]
+                rows.extend(batch)
+                if len(batch) < MAX_CANDLES_PER_REQUEST:
+                    break
+                cursor = rows[-1]['t'] + interval_ms
+
+            return candles_to_columns(rows)
+        except Exception as e:
+            logger.error(f"Error fetching candles for {asset_name}: {e}")
+            return None
+
+    async def get_price_history(self, asset_name: str = "SOL", limit: int = 100,
+                                interval: str = HISTORY_INTERVAL,
+                                end_time: Optional[int] = None) -> List[float]:
+        """Get closing prices for an asset, oldest first
+
+        With an ``end_time`` (epoch ms) only candles that closed by then are
+        returned; otherwise the last value is the still-open candle's price.
+        """
+        # One extra candle in case the last one is still open at end_time
+        candles = await self.get_candles(asset_name, interval, end_time=end_time,
+                                         limit=limit + 1 if end_time is not None else limit)
+        if candles is None:
+            return []
+        closes = candles['close']
+        if end_time is not None:
+            closes = closes[candles['time'] + CANDLE_INTERVAL_MS[interval] <= end_time]
+        return closes[-limit:].tolist()
+
+    def _limit_samples(self) -> List[MetricSample]:
+        """Rate limiter and circuit breaker gauges for the metrics export"""
+        limiter = self.rate_limiter.get_status()
+        breaker = self.circuit_breaker.get_status()
+        samples: List[MetricSample] = [
+            ('rate_limit_available_weight', 'gauge', 'Request weight available without waiting',
+             limiter['available_weight']),
+            ('rate_limit_capacity_weight', 'gauge', 'Rate limit bucket capacity', limiter['capacity']),
+            ('rate_limit_wait_seconds_total', 'counter', 'Time spent waiting for request weight',
+             limiter['total_wait_seconds']),
+            ('rate_limit_shed_total', 'counter', 'Requests rejected locally by the rate limiter',
+             limiter['shed_count'])
+        ]
+        for state in (CLOSED, OPEN, HALF_OPEN):
+            samples.append((f'circuit_breaker_state{{state="{state}"}}', 'gauge',
+                            'Current circuit breaker state', int(breaker['state'] == state)))
+        samples += [
+            ('circuit_breaker_opens_total', 'counter', 'Times the circuit opened', breaker['open_count']),
+            ('circuit_breaker_rejected_total', 'counter', 'Requests rejected while the circuit was open',
+             breaker['rejected_count'])
+        ]
+        return samples
+
+    def get_status(self) -> Dict:
+        """Get client health and rate limit information"""
+        return {
+            'base_url': self.base_url,
+            'meta_cached': self._meta_is_fresh(),
+            'asset_ctxs_cached': self._asset_ctxs_are_fresh(),
+            'rate_limit': self.rate_limiter.get_status(),
+            'upstream_requests': self.upstream_request_count,
+            'coalesced_requests': self.coalesced_count,
+            'inflight_requests': len(self._inflight),
+            'retries': self.retry_count,
+            'failed_requests': self.failed_request_count,
+            'circuit_breaker': self.circuit_breaker.get_status(),
+            'connections': self.get_connection_stats(),
+            'endpoints': self.metrics.get_summary()
+        }
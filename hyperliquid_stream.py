@@ -0,0 +1,230 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import websocket
+from config import (
+    HYPERLIQUID_WS_URL,
+    WS_PING_INTERVAL_SECONDS,
+    WS_RECONNECT_DELAY_SECONDS,
+    WS_RECONNECT_MAX_DELAY_SECONDS
+)
+from json_codec import dumps, decode_ws_message, ws_channel_data
+
+logger = logging.getLogger(__name__)
+
+def _subscription_key(subscription: Dict) -> Tuple[str, Optional[str]]:
+    """Key identifying a channel subscription, e.g. ('l2Book', 'SOL')"""
+    return subscription['type'], subscription.get('coin')
+
+class HyperliquidStream:
+    """WebSocket subscriber for Hyperliquid market data channels
+
+    The socket runs on a background thread. Subscriptions are replayed on
+    every (re)connect, and callbacks are handed to ``loop`` with
+    ``call_soon_threadsafe`` when one is set so that consumers such as
+    PriceAnalyzer only ever run on the asyncio event loop.
+    """
+
+    def __init__(self, ws_url: str = HYPERLIQUID_WS_URL,
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 ping_interval: float = WS_PING_INTERVAL_SECONDS,
+                 reconnect_delay: float = WS_RECONNECT_DELAY_SECONDS,
+                 max_reconnect_delay: float = WS_RECONNECT_MAX_DELAY_SECONDS,
+                 recorder=None):
+        self.ws_url = ws_url
+        self.recorder = recorder
+        self.loop = loop
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._failed_connects = 0
+
+        self._subscriptions: Dict[Tuple[str, Optional[str]], Dict] = {}
+        self._callbacks: Dict[Tuple[str, Optional[str]], List[Callable]] = {}
+        self._lock = threading.Lock()
+        self._ws: Optional[websocket.WebSocketApp] = None
+        self._thread: Optional[threading.Thread] = None
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.is_connected = False
+        self.connect_count = 0
+        self.message_count = 0
+        self.last_message_time = 0.0
+        self.last_pong_time = 0.0
+        self.latest_mids: Dict[str, float] = {}
+        self.last_mids_time = 0.0
+
+    def subscribe(self, subscription: Dict, callback: Callable):
+        """Register a callback for a channel subscription"""
+        key = _subscription_key(subscription)
+        with self._lock:
+            is_new = key not in self._subscriptions
+            self._subscriptions[key] = subscription
+            self._callbacks.setdefault(key, []).append(callback)
+        if is_new and self.is_connected:
+            self._send({"method": "subscribe", "subscription": subscription})
+
+    def subscribe_all_mids(self, callback: Callable[[Dict[str, float]], None]):
+        """Receive {coin: mid} for every asset on each allMids update"""
+        self.subscribe({"type": "allMids"}, callback)
+
+    def subscribe_l2_book(self, coin: str, callback: Callable[[Dict], None]):
+        """Receive raw l2Book updates for one coin"""
+        self.subscribe({"type": "l2Book", "coin": coin}, callback)
+
+    def subscribe_trades(self, coin: str, callback: Callable[[List[Dict]], None]):
+        """Receive batches of trades for one coin"""
+        self.subscribe({"type": "trades", "coin": coin}, callback)
+
+    def get_mid(self, coin: str, max_age: Optional[float] = None) -> Optional[float]:
+        """Latest streamed mid for a coin, or None if missing or older than max_age"""
+        price = self.latest_mids.get(coin)
+        if price is None:
+            return None
+        if max_age is not None and time.time() - self.last_mids_time > max_age:
+            return None
+        return price
+
+    def start(self):
+        """Connect in the background and keep the subscriptions alive"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="hyperliquid-ws", daemon=True)
+        self._thread.start()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="hyperliquid-ws-ping", daemon=True)
+        self._heartbeat_thread.start()
+        logger.info(f"Started WebSocket stream to {self.ws_url}")
+
+    def stop(self):
+        """Close the socket and stop reconnecting"""
+        self._stop_event.set()
+        if self._ws is not None:
+            self._ws.close()
+        logger.info("Stopped WebSocket stream")
+
+    def reconnect(self):
+        """Drop the current socket; the run loop reconnects and resubscribes"""
+        if self._ws is not None:
+            self._ws.close()
+
+    def _run(self):
+        """Connection loop: reconnect until stop() is called"""
+        while not self._stop_event.is_set():
+            self._ws = websocket.WebSocketApp(
+                self.ws_url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close
+            )
+            try:
+                self._ws.run_forever()
+            except Exception as e:
+                logger.error(f"WebSocket run loop error: {e}")
+            self.is_connected = False
+            if not self._stop_event.is_set():
+                # Back off exponentially (with jitter) while connects keep failing
+                delay = min(self.max_reconnect_delay, self.reconnect_delay * 2 ** self._failed_connects)
+                delay *= random.uniform(0.5, 1.0)
+                self._failed_connects += 1
+                logger.warning(f"WebSocket disconnected, reconnecting in {delay:.1f}s")
+                self._stop_event.wait(delay)
+
+    def _heartbeat(self):
+        """Send application-level pings so the server keeps the socket open"""
+        while not self._stop_event.wait(self.ping_interval):
+            if self.is_connected:
+                self._send({"method": "ping"})
+
+    def _send(self, message: Dict):
+        """Send a JSON message, ignoring failures on a closing socket"""
+        try:
+            if self._ws is not None:
+                self._ws.send(dumps(message).decode())
+        except Exception as e:
+            logger.warning(f"Failed to send WebSocket message: {e}")
+
+    def _on_open(self, ws):
+        self.is_connected = True
+        self.connect_count += 1
+        self._failed_connects = 0
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+        for subscription in subscriptions:
+            self._send({"method": "subscribe", "subscription": subscription})
+        logger.info(f"WebSocket connected, subscribed to {len(subscriptions)} channels")
+
+    def _on_error(self, ws, error):
+        logger.error(f"WebSocket error: {error}")
+
+    def _on_close(self, ws, status_code, message):
+        self.is_connected = False
+        logger.info(f"WebSocket closed ({status_code}): {message}")
+
+    def _on_message(self, ws, message: str):
+        self.last_message_time = time.time()
+        self.message_count += 1
+        if self.recorder is not None:
+            self.recorder.record_ws(message)
+        try:
+            channel, payload = decode_ws_message(message)
+        except ValueError:
+            logger.warning("Ignoring non-JSON WebSocket message")
+            return
+        self._handle_channel(channel, payload)
+
+    def _handle_message(self, data: Dict):
+        """Route a decoded message to the callbacks for its channel"""
+        self._handle_channel(*ws_channel_data(data))
+
+    def _handle_channel(self, channel: Optional[str], payload):
+        """Route a message's payload (allMids already as {coin: float}) to its callbacks"""
+        if channel == 'pong':
+            self.last_pong_time = self.last_message_time
+        elif channel == 'allMids':
+            mids = payload
+            self.latest_mids.update(mids)
+            self.last_mids_time = self.last_message_time
+            self._dispatch(('allMids', None), mids)
+        elif channel == 'l2Book':
+            self._dispatch(('l2Book', payload.get('coin')), payload)
+        elif channel == 'trades' and payload:
+            self._dispatch(('trades', payload[0].get('coin')), payload)
+        elif channel == 'subscriptionResponse':
+            logger.debug(f"Subscription acknowledged: {payload}")
+        elif channel == 'error':
+            logger.error(f"WebSocket server error: {payload}")
+
+    def _dispatch(self, key: Tuple[str, Optional[str]], payload):
+        """Deliver a payload to every callback registered for a channel"""
+        with self._lock:
+            callbacks = list(self._callbacks.get(key, ()))
+        for callback in callbacks:
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self._invoke, callback, payload)
+            else:
+                self._invoke(callback, payload)
+
+    @staticmethod
+    def _invoke(callback: Callable, payload):
+        try:
+            callback(payload)
+        except Exception as e:
+            logger.error(f"Error in stream callback: {e}")
+
+    def get_status(self) -> Dict:
+        """Get connection and freshness information for the stream"""
+        now = time.time()
+        return {
+            'connected': self.is_connected,
+            'connect_count': self.connect_count,
+            'message_count': self.message_count,
+            'subscriptions': len(self._subscriptions),
+            'seconds_since_message': now - self.last_message_time if self.last_message_time else None,
+            'seconds_since_pong': now - self.last_pong_time if self.last_pong_time else None
+        }
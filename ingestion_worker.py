@@ -0,0 +1,142 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import logging
+from config import (
+    HYPERLIQUID_WS_URL,
+    TICK_RING_CAPACITY,
+    INGEST_POLL_INTERVAL_SECONDS,
+    WS_RECONNECT_DELAY_SECONDS
+)
+from tick_ring import TickRing
+
+logger = logging.getLogger(__name__)
+
+def run_worker(ring_name: str, ws_url: str, stop_flag, parent_pid: int):
+    """Worker process entry point: stream allMids into the shared tick ring"""
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s[ingest] - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    from hyperliquid_stream import HyperliquidStream
+
+    ring = TickRing.attach(ring_name)
+    stream = HyperliquidStream(ws_url=ws_url)
+    # With no event loop set, callbacks run on the WebSocket thread: the ring's single writer
+    stream.subscribe_all_mids(lambda mids: ring.write_mids(mids, stream.last_mids_time))
+    stream.start()
+    try:
+        while not stop_flag.value:
+            time.sleep(0.5)
+            if os.getppid() != parent_pid:
+                logger.warning("Bot process exited, stopping ingestion")
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop()
+        ring.close()
+
+class IngestionProcess:
+    """Owns the Hyperliquid WebSocket in a separate process
+
+    The worker decodes allMids messages and appends ticks for ``coins`` to
+    a shared-memory TickRing; this side polls the ring and hands each
+    message's prices to ``on_mids`` on the event loop. It exposes
+    ``latest_mids``, ``last_mids_time`` and ``is_connected`` like
+    HyperliquidStream, so it can stand in for one in PriceResolver.
+    """
+
+    def __init__(self, coins: List[str], ws_url: str = HYPERLIQUID_WS_URL,
+                 capacity: int = TICK_RING_CAPACITY,
+                 poll_interval: float = INGEST_POLL_INTERVAL_SECONDS):
+        self.coins = list(coins)
+        self.ws_url = ws_url
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self._context = multiprocessing.get_context('spawn')
+        # A lock-free flag: a worker killed mid-wait can't deadlock it, unlike an Event
+        self._stop_flag = self._context.RawValue('b', 0)
+        self._process: Optional[multiprocessing.Process] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._spawned_at = 0.0
+        self.ring: Optional[TickRing] = None
+
+        self.latest_mids: Dict[str, float] = {}
+        self.last_mids_time = 0.0
+        self.tick_count = 0
+        self.restart_count = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self, on_mids: Callable[[Dict[str, float]], None]):
+        """Create the ring, spawn the worker and start polling"""
+        self.ring = TickRing.create(self.coins, self.capacity)
+        self._stop_flag.value = 0
+        self._spawn()
+        self._poll_task = asyncio.create_task(self._poll(on_mids))
+
+    def _spawn(self):
+        self._process = self._context.Process(
+            target=run_worker,
+            args=(self.ring.name, self.ws_url, self._stop_flag, os.getpid()),
+            name="hyperliquid-ingest",
+            daemon=True
+        )
+        self._process.start()
+        self._spawned_at = time.monotonic()
+        logger.info(f"Started ingestion worker (pid {self._process.pid}) on ring {self.ring.name}")
+
+    async def _poll(self, on_mids: Callable[[Dict[str, float]], None]):
+        while True:
+            try:
+                self._deliver(self.ring.read_new(), on_mids)
+                if (not self._process.is_alive() and not self._stop_flag.value and
+                        time.monotonic() - self._spawned_at > WS_RECONNECT_DELAY_SECONDS):
+                    self.restart_count += 1
+                    logger.error(f"Ingestion worker exited ({self._process.exitcode}), restarting")
+                    self._spawn()
+            except Exception as e:
+                logger.error(f"Error polling tick ring: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _deliver(self, ticks: np.ndarray, on_mids: Callable[[Dict[str, float]], None]):
+        """Regroup ticks into per-message {coin: price} dicts, oldest first"""
+        if not len(ticks):
+            return
+        self.tick_count += len(ticks)
+        times = ticks['time']
+        boundaries = np.flatnonzero(times[1:] != times[:-1]) + 1
+        coins = self.ring.coins
+        for batch in np.split(ticks, boundaries):
+            mids = {coins[coin_id]: price for coin_id, price in zip(batch['coin'].tolist(), batch['price'].tolist())}
+            self.latest_mids.update(mids)
+            self.last_mids_time = float(batch['time'][0])
+            on_mids(mids)
+
+    def stop(self):
+        """Stop polling and the worker, and release the shared memory"""
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+        if self._process is not None:
+            self._stop_flag.value = 1
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def get_status(self) -> Dict:
+        return {
+            'worker_alive': self.is_connected,
+            'restarts': self.restart_count,
+            'ticks': self.tick_count,
+            'seconds_since_tick': time.time() - self.last_mids_time if self.last_mids_time else None,
+            'ring': self.ring.get_status() if self.ring is not None else None
+        }
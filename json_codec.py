@@ -0,0 +1,97 @@
+import json
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Pick the fastest available JSON backend: orjson, then msgspec, then stdlib
+try:
+    import orjson
+
+    BACKEND = 'orjson'
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Decode a JSON document"""
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """Encode an object as compact JSON bytes"""
+        return orjson.dumps(obj)
+except ImportError:
+    try:
+        import msgspec
+
+        BACKEND = 'msgspec'
+        _decoder = msgspec.json.Decoder()
+        _encoder = msgspec.json.Encoder()
+
+        def loads(data: Union[bytes, str]) -> Any:
+            """Decode a JSON document"""
+            return _decoder.decode(data)
+
+        def dumps(obj: Any) -> bytes:
+            """Encode an object as compact JSON bytes"""
+            return _encoder.encode(obj)
+    except ImportError:
+        BACKEND = 'json'
+
+        def loads(data: Union[bytes, str]) -> Any:
+            """Decode a JSON document"""
+            return json.loads(data)
+
+        def dumps(obj: Any) -> bytes:
+            """Encode an object as compact JSON bytes"""
+            return json.dumps(obj, separators=(',', ':')).encode()
+
+# msgspec also decodes WebSocket messages into typed structs (generic decoding without it)
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if msgspec is not None:
+    class _WsEnvelope(msgspec.Struct):
+        channel: Optional[str] = None
+        # Left undecoded until the channel says what it holds
+        data: msgspec.Raw = msgspec.Raw()
+
+    class _AllMids(msgspec.Struct):
+        mids: Dict[str, float] = {}
+
+    _ws_envelope_decoder = msgspec.json.Decoder(_WsEnvelope)
+    # Non-strict mode parses the API's decimal strings straight into floats
+    _all_mids_decoder = msgspec.json.Decoder(_AllMids, strict=False)
+
+def ws_channel_data(message: Dict) -> Tuple[Optional[str], Any]:
+    """Split a decoded WebSocket message into (channel, data)
+
+    allMids data is returned as {coin: float}; other channels as decoded.
+    """
+    channel, data = message.get('channel'), message.get('data')
+    if channel == 'allMids':
+        data = {coin: float(px) for coin, px in (data or {}).get('mids', {}).items()}
+    return channel, data
+
+def decode_ws_message(message: Union[bytes, str]) -> Tuple[Optional[str], Any]:
+    """Decode a raw WebSocket message into (channel, data), like ws_channel_data
+
+    With msgspec the allMids payload, the bulk of the stream, is decoded
+    directly into a dict of floats with no intermediate price strings.
+    Raises ValueError for malformed messages.
+    """
+    if msgspec is None:
+        return ws_channel_data(loads(message))
+    envelope = _ws_envelope_decoder.decode(message)
+    if envelope.channel == 'allMids':
+        return envelope.channel, _all_mids_decoder.decode(envelope.data).mids
+    data = bytes(envelope.data)
+    return envelope.channel, loads(data) if data else None
+
+def parse_decimals(values: Sequence) -> np.ndarray:
+    """Convert decimal strings (as the API sends prices and sizes) to float64
+
+    Callers gather the strings into a list first; NumPy then parses them
+    into the array in one call instead of a float() per value.
+    """
+    return np.array(values, dtype=np.float64)
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Hyperliquid /info and WebSocket APIs
+
+Serves synthetic, seeded market data so the client, the bot and the
+benchmarks can run without network access. Point the bot at it with:
+
+    HYPERLIQUID_API_BASE=http://127.0.0.1:8080 \\
+    HYPERLIQUID_WS_URL=ws://127.0.0.1:8080/ws python app.py
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import math
+import random
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+import numpy as np
+from json_codec import loads, dumps
+from rate_limiter import WeightedRateLimiter, RateLimitExceeded, request_weight
+from hyperliquid_client import CANDLE_INTERVAL_MS, MAX_CANDLES_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+WS_MAGIC = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+BOOK_LEVELS = 20
+
+DEFAULT_START_PRICES = {
+    'BTC': 65000.0,
+    'ETH': 3200.0,
+    'SOL': 45.0,
+    'HYPE': 25.0
+}
+
+class SyntheticMarket:
+    """Seeded geometric Brownian motion price paths and books for a set of coins"""
+
+    def __init__(self, start_prices: Optional[Dict[str, float]] = None, seed: int = 0,
+                 annual_volatility: float = 0.8, spread_bps: float = 2.0):
+        self.start_prices = dict(start_prices or DEFAULT_START_PRICES)
+        self.seed = seed
+        self.annual_volatility = annual_volatility
+        self.spread_bps = spread_bps
+        self.rng = np.random.default_rng(seed)
+        self.coins = list(self.start_prices)
+        self.prices = np.array([self.start_prices[coin] for coin in self.coins])
+        self.last_step = time.time()
+        self._trade_id = 0
+
+    def step(self, now: Optional[float] = None):
+        """Advance every price path to ``now``"""
+        now = now if now is not None else time.time()
+        dt_years = max(now - self.last_step, 0.0) / (365 * 24 * 3600)
+        self.last_step = now
+        if dt_years == 0:
+            return
+        sigma = self.annual_volatility
+        shocks = self.rng.standard_normal(len(self.prices))
+        self.prices *= np.exp(-0.5 * sigma ** 2 * dt_years + sigma * math.sqrt(dt_years) * shocks)
+
+    def meta(self) -> Dict:
+        return {
+            'universe': [
+                {'name': coin, 'szDecimals': 2 if price < 1000 else 4, 'maxLeverage': 20}
+                for coin, price in zip(self.coins, self.prices)
+            ]
+        }
+
+    def asset_contexts(self) -> List[Dict]:
+        """Per-asset contexts in universe order, as in metaAndAssetCtxs"""
+        contexts = []
+        for coin, price in zip(self.coins, self.prices):
+            oracle = price * (1 + self.rng.normal(0, 1e-4))
+            premium = (price - oracle) / oracle
+            day_base_volume = self.rng.exponential(1e6 / price)
+            half_spread = price * self.spread_bps / 20_000
+            contexts.append({
+                'funding': f"{premium / 8 + 1.25e-5:.8f}",
+                'openInterest': f"{self.rng.exponential(5e6 / price):.2f}",
+                'prevDayPx': f"{self.start_prices[coin]:.6g}",
+                'dayNtlVlm': f"{day_base_volume * price:.2f}",
+                'dayBaseVlm': f"{day_base_volume:.2f}",
+                'premium': f"{premium:.8f}",
+                'oraclePx': f"{oracle:.6g}",
+                'markPx': f"{price:.6g}",
+                'midPx': f"{price:.6g}",
+                'impactPxs': [f"{price - 2 * half_spread:.6g}", f"{price + 2 * half_spread:.6g}"]
+            })
+        return contexts
+
+    def mids(self) -> Dict[str, str]:
+        return {coin: f"{price:.6g}" for coin, price in zip(self.coins, self.prices)}
+
+    def mid(self, coin: str) -> Optional[float]:
+        if coin not in self.start_prices:
+            return None
+        return float(self.prices[self.coins.index(coin)])
+
+    def l2_book(self, coin: str) -> Optional[Dict]:
+        mid = self.mid(coin)
+        if mid is None:
+            return None
+        half_spread = mid * self.spread_bps / 20_000
+        tick = mid * 1e-4
+        offsets = np.arange(BOOK_LEVELS) * tick
+        bid_sizes = self.rng.exponential(10.0, BOOK_LEVELS)
+        ask_sizes = self.rng.exponential(10.0, BOOK_LEVELS)
+        return {
+            'coin': coin,
+            'time': int(time.time() * 1000),
+            'levels': [
+                [{'px': f"{mid - half_spread - offset:.6g}", 'sz': f"{size:.2f}", 'n': 1}
+                 for offset, size in zip(offsets, bid_sizes)],
+                [{'px': f"{mid + half_spread + offset:.6g}", 'sz': f"{size:.2f}", 'n': 1}
+                 for offset, size in zip(offsets, ask_sizes)]
+            ]
+        }
+
+    def trades(self, coin: str, count: int = 2) -> List[Dict]:
+        mid = self.mid(coin)
+        if mid is None:
+            return []
+        trades = []
+        for _ in range(count):
+            self._trade_id += 1
+            side = 'B' if self.rng.random() < 0.5 else 'A'
+            trades.append({
+                'coin': coin,
+                'side': side,
+                'px': f"{mid * (1 + (1 if side == 'B' else -1) * self.spread_bps / 20_000):.6g}",
+                'sz': f"{self.rng.exponential(2.0):.2f}",
+                'time': int(time.time() * 1000),
+                'hash': f"0x{self._trade_id:064x}",
+                'tid': self._trade_id
+            })
+        return trades
+
+    def candles(self, coin: str, interval: str, start_time: int, end_time: int) -> List[Dict]:
+        """Deterministic candles for a request: the same arguments give the same bars"""
+        if coin not in self.start_prices or interval not in CANDLE_INTERVAL_MS:
+            return []
+        interval_ms = CANDLE_INTERVAL_MS[interval]
+        end_time = min(end_time, int(time.time() * 1000))
+        first_open = -(-start_time // interval_ms) * interval_ms
+        opens = np.arange(first_open, end_time, interval_ms, dtype=np.int64)[:MAX_CANDLES_PER_REQUEST]
+        if not len(opens):
+            return []
+
+        # Walk a seeded path keyed by (seed, coin, interval, first bar)
+        rng = np.random.default_rng(zlib.crc32(f"{self.seed}:{coin}:{interval}:{opens[0]}".encode()))
+        sigma = self.annual_volatility * math.sqrt(interval_ms / (365 * 24 * 3600 * 1000))
+        closes = self.start_prices[coin] * np.exp(np.cumsum(rng.normal(0, sigma, len(opens))))
+        prev = np.concatenate(([self.start_prices[coin]], closes[:-1]))
+        wiggle = np.abs(rng.normal(0, sigma / 2, len(opens)))
+        highs = np.maximum(prev, closes) * (1 + wiggle)
+        lows = np.minimum(prev, closes) * (1 - wiggle)
+        volumes = rng.exponential(1000.0, len(opens))
+        return [
+            {'t': int(t), 'T': int(t + interval_ms - 1), 's': coin, 'i': interval,
+             'o': f"{o:.6g}", 'c': f"{c:.6g}", 'h': f"{h:.6g}", 'l': f"{l:.6g}",
+             'v': f"{v:.2f}", 'n': int(v // 10)}
+            for t, o, c, h, l, v in zip(opens, prev, closes, highs, lows, volumes)
+        ]
+
+class MockHyperliquidServer:
+    """asyncio HTTP/1.1 + WebSocket server mimicking the Hyperliquid info API
+
+    ``latency`` (seconds, with ``jitter``) is added to every /info response,
+    ``error_rate`` is the fraction of requests answered with HTTP 500, and
+    requests beyond ``weight_per_minute`` are throttled with 429.
+    """
+
+    def __init__(self, market: Optional[SyntheticMarket] = None,
+                 host: str = "127.0.0.1", port: int = 8080,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 weight_per_minute: Optional[float] = 1200, ws_push_interval: float = 0.5,
+                 seed: int = 0):
+        self.market = market or SyntheticMarket(seed=seed)
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.ws_push_interval = ws_push_interval
+        self.rng = random.Random(seed)
+        self.limiter = None
+        if weight_per_minute:
+            self.limiter = WeightedRateLimiter(weight_per_minute, weight_per_minute / 60, max_wait=0)
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._ws_writers: Set[asyncio.StreamWriter] = set()
+        self.request_count = 0
+        self.error_count = 0
+        self.throttled_count = 0
+        self.ws_message_count = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/ws"
+
+    async def start(self):
+        """Start listening; with port 0 an ephemeral port is picked"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ticker = asyncio.create_task(self._tick())
+        logger.info(f"Mock Hyperliquid API listening on {self.base_url} (ws: {self.ws_url})")
+
+    async def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+        self.drop_ws_connections()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def drop_ws_connections(self):
+        """Abruptly close every WebSocket connection (simulates a disconnect)"""
+        for writer in list(self._ws_writers):
+            writer.close()
+        self._ws_writers.clear()
+
+    async def _tick(self):
+        while True:
+            self.market.step()
+            await asyncio.sleep(self.ws_push_interval)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if headers.get('upgrade', '').lower() == 'websocket':
+                    await self._serve_websocket(reader, writer, headers)
+                    break
+                status, response_body, extra_headers = await self._handle_http(method, path, body)
+                self._write_response(writer, status, response_body, extra_headers)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown; end the connection quietly
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, _ = request_line.decode('latin-1').split(' ', 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = b''
+        if 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        return method, path, headers, body
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, body: bytes,
+                        extra_headers: Optional[Dict[str, str]] = None):
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                  429: 'Too Many Requests', 500: 'Internal Server Error'}.get(status, '')
+        headers = {'Content-Type': 'application/json', 'Content-Length': str(len(body))}
+        headers.update(extra_headers or {})
+        head = f"HTTP/1.1 {status} {reason}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        writer.write(head.encode('latin-1') + b"\r\n" + body)
+
+    async def _handle_http(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, Dict[str, str]]:
+        self.request_count += 1
+        if method != 'POST' or path != '/info':
+            return 404, dumps({'error': 'not found'}), {}
+        try:
+            payload = loads(body)
+        except ValueError:
+            return 400, dumps({'error': 'invalid json'}), {}
+
+        if self.limiter is not None:
+            try:
+                await self.limiter.acquire(request_weight(payload))
+            except RateLimitExceeded:
+                self.throttled_count += 1
+                return 429, dumps({'error': 'rate limited'}), {'Retry-After': '1'}
+
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.error_count += 1
+            return 500, dumps({'error': 'injected failure'}), {}
+
+        result = self.handle_info(payload)
+        if result is NotImplemented:
+            return 400, dumps({'error': f"unsupported type {payload.get('type')}"}), {}
+        return 200, dumps(result), {}
+
+    def handle_info(self, payload: Dict):
+        """Answer an /info payload from the synthetic market"""
+        request_type = payload.get('type')
+        if request_type == 'meta':
+            return self.market.meta()
+        if request_type == 'metaAndAssetCtxs':
+            return [self.market.meta(), self.market.asset_contexts()]
+        if request_type == 'allMids':
+            return self.market.mids()
+        if request_type == 'l2Book':
+            return self.market.l2_book(payload.get('coin'))
+        if request_type == 'candleSnapshot':
+            req = payload.get('req', {})
+            return self.market.candles(req.get('coin'), req.get('interval'),
+                                       int(req.get('startTime', 0)), int(req.get('endTime', 0)))
+        return NotImplemented
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                               headers: Dict[str, str]):
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + WS_MAGIC).encode()).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        await writer.drain()
+
+        self._ws_writers.add(writer)
+        subscriptions: List[Dict] = []
+        pusher = asyncio.create_task(self._push_updates(writer, subscriptions))
+        try:
+            while True:
+                opcode, data = await self._read_frame(reader)
+                if opcode == 0x8:  # close
+                    break
+                if opcode == 0x9:  # protocol ping
+                    self._write_frame(writer, data, opcode=0xA)
+                elif opcode == 0x1:
+                    self._handle_ws_message(writer, loads(data), subscriptions)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            pusher.cancel()
+            self._ws_writers.discard(writer)
+
+    def _handle_ws_message(self, writer: asyncio.StreamWriter, message: Dict, subscriptions: List[Dict]):
+        method = message.get('method')
+        if method == 'ping':
+            self._send_ws(writer, {'channel': 'pong'})
+        elif method == 'subscribe':
+            subscription = message.get('subscription', {})
+            subscriptions.append(subscription)
+            self._send_ws(writer, {'channel': 'subscriptionResponse', 'data': message})
+        elif method == 'unsubscribe':
+            subscription = message.get('subscription', {})
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            self._send_ws(writer, {'channel': 'subscriptionResponse', 'data': message})
+
+    async def _push_updates(self, writer: asyncio.StreamWriter, subscriptions: List[Dict]):
+        while True:
+            await asyncio.sleep(self.ws_push_interval)
+            for subscription in list(subscriptions):
+                channel = subscription.get('type')
+                if channel == 'allMids':
+                    data = {'mids': self.market.mids()}
+                elif channel == 'l2Book':
+                    data = self.market.l2_book(subscription.get('coin'))
+                elif channel == 'trades':
+                    data = self.market.trades(subscription.get('coin'))
+                else:
+                    continue
+                if data:
+                    self._send_ws(writer, {'channel': channel, 'data': data})
+            await writer.drain()
+
+    def _send_ws(self, writer: asyncio.StreamWriter, message: Dict):
+        self.ws_message_count += 1
+        self._write_frame(writer, dumps(message))
+
+    @staticmethod
+    def _write_frame(writer: asyncio.StreamWriter, payload: bytes, opcode: int = 0x1):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        writer.write(header + payload)
+
+    @staticmethod
+    async def _read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+        """Read one (unfragmented) client frame and unmask its payload"""
+        first, second = await reader.readexactly(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await reader.readexactly(8))[0]
+        mask = await reader.readexactly(4) if second & 0x80 else b'\x00\x00\x00\x00'
+        data = bytearray(await reader.readexactly(length))
+        for i in range(length):
+            data[i] ^= mask[i % 4]
+        return opcode, bytes(data)
+
+    def get_status(self) -> Dict:
+        return {
+            'requests': self.request_count,
+            'errors': self.error_count,
+            'throttled': self.throttled_count,
+            'ws_connections': len(self._ws_writers),
+            'ws_messages': self.ws_message_count
+        }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run a local mock Hyperliquid API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Added latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Uniform extra latency per request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument('--weight-per-minute', type=float, default=1200, help="Throttle limit (0 disables)")
+    parser.add_argument('--ws-push-interval', type=float, default=0.5, help="Seconds between WS updates")
+    parser.add_argument('--volatility', type=float, default=0.8, help="Annualised volatility of price paths")
+    args = parser.parse_args()
+
+    server = MockHyperliquidServer(
+        market=SyntheticMarket(seed=args.seed, annual_volatility=args.volatility),
+        host=args.host,
+        port=args.port,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        weight_per_minute=args.weight_per_minute or None,
+        ws_push_interval=args.ws_push_interval,
+        seed=args.seed
+    )
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,302 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import logging
+from config import ORDER_BOOK_MAX_GAP_SECONDS, LIQUIDITY_DEPTH_BPS
+from json_codec import parse_decimals
+
+logger = logging.getLogger(__name__)
+
+BID = 'bid'
+ASK = 'ask'
+
+def parse_levels(levels: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert one side of l2Book levels into (prices, sizes) arrays"""
+    return (parse_decimals([level['px'] for level in levels]),
+            parse_decimals([level['sz'] for level in levels]))
+
+class L2Snapshot:
+    """Immutable array-backed L2 book: prices and sizes per side, best first
+
+    Cumulative sizes are precomputed once, so depth lookups are a binary
+    search and the liquidity metrics are vectorized over the levels.
+    """
+
+    __slots__ = ('coin', 'time', 'bid_prices', 'bid_sizes', 'ask_prices', 'ask_sizes',
+                 '_bid_cumulative', '_ask_cumulative')
+
+    def __init__(self, coin: str, time_ms: int,
+                 bid_prices: np.ndarray, bid_sizes: np.ndarray,
+                 ask_prices: np.ndarray, ask_sizes: np.ndarray):
+        self.coin = coin
+        self.time = time_ms
+        self.bid_prices = bid_prices
+        self.bid_sizes = bid_sizes
+        self.ask_prices = ask_prices
+        self.ask_sizes = ask_sizes
+        self._bid_cumulative = np.cumsum(bid_sizes)
+        self._ask_cumulative = np.cumsum(ask_sizes)
+
+    @classmethod
+    def from_levels(cls, data: Dict) -> "L2Snapshot":
+        """Build a snapshot from an l2Book message or REST response"""
+        bids, asks = data['levels']
+        bid_prices, bid_sizes = parse_levels(bids)
+        ask_prices, ask_sizes = parse_levels(asks)
+        return cls(data.get('coin', ''), int(data.get('time', 0)),
+                   bid_prices, bid_sizes, ask_prices, ask_sizes)
+
+    def _side(self, side: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if side == BID:
+            return self.bid_prices, self.bid_sizes, self._bid_cumulative
+        return self.ask_prices, self.ask_sizes, self._ask_cumulative
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return float(self.bid_prices[0]) if len(self.bid_prices) else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return float(self.ask_prices[0]) if len(self.ask_prices) else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if not len(self.bid_prices) or not len(self.ask_prices):
+            return None
+        return float(self.bid_prices[0] + self.ask_prices[0]) / 2
+
+    @property
+    def spread(self) -> Optional[float]:
+        if not len(self.bid_prices) or not len(self.ask_prices):
+            return None
+        return float(self.ask_prices[0] - self.bid_prices[0])
+
+    def total_depth(self, side: str) -> float:
+        """Total visible size on one side"""
+        cumulative = self._side(side)[2]
+        return float(cumulative[-1]) if len(cumulative) else 0.0
+
+    def cumulative_depth(self, side: str, price: float) -> float:
+        """Total size resting at prices at least as good as ``price``"""
+        prices, _, cumulative = self._side(side)
+        if side == BID:
+            # Bids are descending; search the negated prices
+            count = np.searchsorted(-prices, -price, side='right')
+        else:
+            count = np.searchsorted(prices, price, side='right')
+        return float(cumulative[count - 1]) if count else 0.0
+
+    def depth_within_bps(self, bps: float = LIQUIDITY_DEPTH_BPS) -> Tuple[float, float]:
+        """(bid, ask) size resting within ``bps`` basis points of the mid"""
+        mid = self.mid
+        if mid is None:
+            return 0.0, 0.0
+        band = mid * bps / 10_000
+        return self.cumulative_depth(BID, mid - band), self.cumulative_depth(ASK, mid + band)
+
+    def imbalance(self, bps: float = LIQUIDITY_DEPTH_BPS) -> Optional[float]:
+        """Book imbalance within ``bps`` of the mid, from -1 (all asks) to +1 (all bids)"""
+        bid_depth, ask_depth = self.depth_within_bps(bps)
+        total = bid_depth + ask_depth
+        if total == 0:
+            return None
+        return (bid_depth - ask_depth) / total
+
+    def microprice(self) -> Optional[float]:
+        """Top-of-book price weighted toward the side with less size"""
+        if not len(self.bid_sizes) or not len(self.ask_sizes):
+            return None
+        bid_size, ask_size = self.bid_sizes[0], self.ask_sizes[0]
+        if bid_size + ask_size == 0:
+            return self.mid
+        return float((self.bid_prices[0] * ask_size + self.ask_prices[0] * bid_size) / (bid_size + ask_size))
+
+    def price_for_size(self, side: str, size: float) -> Optional[float]:
+        """Worst level price touched when filling ``size`` against a side
+
+        A buy consumes the asks (side='ask'), a sell the bids. Returns None
+        if the visible book is too thin.
+        """
+        prices, _, cumulative = self._side(side)
+        level = np.searchsorted(cumulative, size, side='left')
+        return float(prices[level]) if level < len(prices) else None
+
+    def slippage_bps(self, side: str, size: float) -> Optional[float]:
+        """Average fill price distance from the mid, in bps, for a market order
+
+        ``side`` is the book side consumed, as in price_for_size(). Returns
+        None if the visible book can't fill ``size``.
+        """
+        prices, sizes, cumulative = self._side(side)
+        mid = self.mid
+        if mid is None or size <= 0 or not len(cumulative) or cumulative[-1] < size:
+            return None
+        # Size taken from each level: whatever remains after the better levels
+        filled = np.clip(size - (cumulative - sizes), 0, sizes)
+        average_price = float(np.dot(filled, prices)) / size
+        return abs(average_price - mid) / mid * 10_000
+
+    def get_metrics(self, bps: float = LIQUIDITY_DEPTH_BPS) -> Dict:
+        """Get liquidity signals for analysis and display"""
+        bid_depth, ask_depth = self.depth_within_bps(bps)
+        return {
+            'mid': self.mid,
+            'spread': self.spread,
+            'microprice': self.microprice(),
+            'imbalance': self.imbalance(bps),
+            'depth_bps': bps,
+            'bid_depth': bid_depth,
+            'ask_depth': ask_depth
+        }
+
+class OrderBook:
+    """In-memory L2 order book for one coin
+
+    Updates are l2Book messages ({'coin', 'time', 'levels': [bids, asks]}).
+    Messages older than the current book are dropped, and a jump between
+    consecutive update times larger than ``max_gap_seconds`` flags the book
+    for a snapshot resync. Each update is held as an L2Snapshot, so
+    top-of-book reads are O(1) and depth queries are a binary search.
+    """
+
+    def __init__(self, coin: str, max_gap_seconds: float = ORDER_BOOK_MAX_GAP_SECONDS):
+        self.coin = coin
+        self.max_gap_ms = max_gap_seconds * 1000
+        self.snapshot: Optional[L2Snapshot] = None
+
+        self.last_update_ms = 0
+        self.needs_resync = True
+        self.update_count = 0
+        self.stale_count = 0
+        self.gap_count = 0
+
+    def apply(self, data: Dict, is_snapshot: bool = False) -> bool:
+        """Apply an l2Book message; returns False if it was stale and dropped"""
+        update_ms = int(data.get('time', 0))
+        if update_ms and update_ms <= self.last_update_ms:
+            self.stale_count += 1
+            return False
+
+        if (not is_snapshot and self.last_update_ms and
+                update_ms - self.last_update_ms > self.max_gap_ms):
+            self.gap_count += 1
+            self.needs_resync = True
+            logger.warning(f"{self.coin} book gap of {update_ms - self.last_update_ms}ms, resync needed")
+
+        self.snapshot = L2Snapshot.from_levels(data)
+        self.last_update_ms = update_ms or int(time.time() * 1000)
+        self.update_count += 1
+        if is_snapshot:
+            self.needs_resync = False
+        return True
+
+    def mark_for_resync(self):
+        """Flag the book as unreliable until a fresh snapshot arrives"""
+        self.needs_resync = True
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the last applied update"""
+        if not self.last_update_ms:
+            return None
+        return time.time() - self.last_update_ms / 1000
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.snapshot.best_bid if self.snapshot is not None else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.snapshot.best_ask if self.snapshot is not None else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        return self.snapshot.mid if self.snapshot is not None else None
+
+    @property
+    def spread(self) -> Optional[float]:
+        return self.snapshot.spread if self.snapshot is not None else None
+
+    def cumulative_depth(self, side: str, price: float) -> float:
+        """Total size resting at prices at least as good as ``price``"""
+        return self.snapshot.cumulative_depth(side, price) if self.snapshot is not None else 0.0
+
+    def price_for_size(self, side: str, size: float) -> Optional[float]:
+        """Worst level price touched when filling ``size`` against a side"""
+        return self.snapshot.price_for_size(side, size) if self.snapshot is not None else None
+
+    def get_summary(self) -> Dict:
+        """Get top-of-book figures for display"""
+        return {
+            'coin': self.coin,
+            'best_bid': self.best_bid,
+            'best_ask': self.best_ask,
+            'mid': self.mid,
+            'spread': self.spread,
+            'bid_depth': self.snapshot.total_depth(BID) if self.snapshot is not None else 0.0,
+            'ask_depth': self.snapshot.total_depth(ASK) if self.snapshot is not None else 0.0,
+            'age_seconds': self.age_seconds(),
+            'needs_resync': self.needs_resync
+        }
+
+class OrderBookManager:
+    """Keeps an OrderBook per coin current from the l2Book WebSocket channel
+
+    Books are seeded and resynced from REST l2Book snapshots whenever a gap
+    is detected or the stream reconnects. Callbacks must run on the asyncio
+    loop (HyperliquidStream does this when its ``loop`` is set).
+    """
+
+    def __init__(self, client, stream, max_gap_seconds: float = ORDER_BOOK_MAX_GAP_SECONDS):
+        self.client = client
+        self.stream = stream
+        self.max_gap_seconds = max_gap_seconds
+        self.books: Dict[str, OrderBook] = {}
+        self._resync_tasks: Dict[str, asyncio.Task] = {}
+        self._seen_connect_count = 0
+        self.resync_count = 0
+
+    def track(self, coin: str):
+        """Start maintaining a book for a coin"""
+        if coin in self.books:
+            return
+        self.books[coin] = OrderBook(coin, self.max_gap_seconds)
+        self.stream.subscribe_l2_book(coin, self._on_book_update)
+
+    def get_book(self, coin: str) -> Optional[OrderBook]:
+        """Return the book for a coin if it is tracked and in sync"""
+        book = self.books.get(coin)
+        if book is None or book.needs_resync:
+            return None
+        return book
+
+    def _on_book_update(self, data: Dict):
+        book = self.books.get(data.get('coin'))
+        if book is None:
+            return
+        # A new connection means updates may have been missed in between
+        if self.stream.connect_count != self._seen_connect_count:
+            self._seen_connect_count = self.stream.connect_count
+            for tracked in self.books.values():
+                tracked.mark_for_resync()
+        book.apply(data)
+        if book.needs_resync:
+            self._schedule_resync(book.coin)
+
+    def _schedule_resync(self, coin: str):
+        task = self._resync_tasks.get(coin)
+        if task is None or task.done():
+            self._resync_tasks[coin] = asyncio.create_task(self.resync(coin))
+
+    async def resync(self, coin: str) -> bool:
+        """Reload a coin's book from a REST l2Book snapshot"""
+        snapshot = await self.client.get_l2_book(coin)
+        book = self.books.get(coin)
+        if snapshot is None or book is None:
+            return False
+        self.resync_count += 1
+        # A newer streamed update may already have superseded the snapshot
+        if not book.apply(snapshot, is_snapshot=True):
+            book.needs_resync = False
+        logger.info(f"Resynced {coin} order book from snapshot")
+        return True
@@ -1,24 +1,57 @@
 import numpy as np
 import pandas as pd
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 import logging
-from config import TARGET_PRICE, STANDARD_DEVIATIONS, ALERT_THRESHOLD, CRITICAL_PRICE_THRESHOLD, STRONG_DOWNTREND_THRESHOLD
+from config import TARGET_PRICE, STANDARD_DEVIATIONS, ALERT_THRESHOLD, CRITICAL_PRICE_THRESHOLD, STRONG_DOWNTREND_THRESHOLD, PRICE_HISTORY_WINDOW
 
 logger = logging.getLogger(__name__)
 
 class PriceAnalyzer:
+    """Statistics over a window of evenly spaced bar closes
+
+    ``price_history`` holds closes of completed bars (one resolution, see
+    HISTORY_INTERVAL). The latest tick is kept separately as
+    ``current_price``, the still-open bar's running close, so a fast feed
+    moves the current price without flooding the window.
+    """
+
     def __init__(self, target_price: float = TARGET_PRICE, std_deviations: float = STANDARD_DEVIATIONS):
         self.target_price = target_price
         self.std_deviations = std_deviations
         self.price_history = []
+        self.current_price: Optional[float] = None
         self.alert_sent = False
+        self.liquidity = None
     
     def add_price(self, price: float):
-        """Add a new price to the history"""
+        """Add a completed bar's close to the history
+
+        ``current_price`` is left alone: the newest tick is still the best
+        estimate of the next bar's close, and a bar published late (after
+        a stream gap) must not take its place.
+        """
         self.price_history.append(price)
-        # Keep only the last 100 prices to avoid memory issues
-        if len(self.price_history) > 100:
-            self.price_history = self.price_history[-100:]
+        # Keep only the last PRICE_HISTORY_WINDOW prices to avoid memory issues
+        if len(self.price_history) > PRICE_HISTORY_WINDOW:
+            self.price_history = self.price_history[-PRICE_HISTORY_WINDOW:]
+    
+    def set_current_price(self, price: float):
+        """Update the latest price without adding a point to the history"""
+        self.current_price = price
+    
+    def _prices(self) -> List[float]:
+        """Bar closes followed by the open bar's latest price, if any"""
+        if self.current_price is None:
+            return self.price_history
+        return self.price_history + [self.current_price]
+    
+    def load_history(self, prices: List[float]):
+        """Seed the history with older prices (oldest first), e.g. from a backfill"""
+        self.price_history = (list(prices) + self.price_history)[-PRICE_HISTORY_WINDOW:]
+    
+    def update_liquidity(self, snapshot):
+        """Record liquidity signals (depth, imbalance, microprice) from an L2Snapshot"""
+        self.liquidity = snapshot.get_metrics()
     
     def calculate_statistics(self) -> Dict[str, float]:
         """Calculate statistical measures from price history"""
@@ -31,7 +64,7 @@ class PriceAnalyzer:
                 'current': 0
             }
         
-        prices = np.array(self.price_history)
+        prices = np.array(self._prices())
         return {
             'mean': float(np.mean(prices)),
             'std': float(np.std(prices)),
@@ -133,7 +166,7 @@ class PriceAnalyzer:
         if len(self.price_history) < 10:
             return "insufficient_data"
         
-        recent_prices = self.price_history[-10:]
+        recent_prices = self._prices()[-10:]
         if len(recent_prices) < 2:
             return "insufficient_data"
         
@@ -176,5 +209,6 @@ class PriceAnalyzer:
             'should_alert': should_alert,
             'is_urgent': is_urgent,
             'alert_info': alert_info,
+            'liquidity': self.liquidity,
             'price_history_length': len(self.price_history)
         } 
\ No newline at end of file
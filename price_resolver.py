@@ -0,0 +1,116 @@
+import time
+from typing import Dict, NamedTuple, Optional
+import logging
+from config import STREAM_STALE_SECONDS, ALL_MIDS_MAX_AGE_SECONDS, PRICE_FALLBACK_MAX_AGE_SECONDS
+from order_book import L2Snapshot
+
+logger = logging.getLogger(__name__)
+
+SOURCE_STREAM = 'stream'
+SOURCE_ALL_MIDS = 'allMids'
+SOURCE_L2_BOOK = 'l2Book'
+
+class ResolvedPrice(NamedTuple):
+    """A price together with where it came from and how old it is"""
+    coin: str
+    price: float
+    source: str
+    observed_at: float  # Wall-clock time the price was current
+    stale: bool = False  # Every live source failed; this is the last known price
+    book: Optional[L2Snapshot] = None  # Set for l2Book prices
+
+    @property
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.observed_at)
+
+class PriceResolver:
+    """Resolves a coin's price from the cheapest source that is fresh enough
+
+    Tiers, in order: the WebSocket mid if younger than ``stream_max_age``
+    (memory only), a cached allMids snapshot if younger than
+    ``mids_max_age`` (refreshed with one allMids request for all coins when
+    stale), then a direct l2Book fetch. If all of them fail, the newest
+    known price up to ``fallback_max_age`` old is returned marked stale
+    rather than losing the cycle.
+    """
+
+    def __init__(self, client, stream=None,
+                 stream_max_age: float = STREAM_STALE_SECONDS,
+                 mids_max_age: float = ALL_MIDS_MAX_AGE_SECONDS,
+                 fallback_max_age: float = PRICE_FALLBACK_MAX_AGE_SECONDS):
+        self.client = client
+        self.stream = stream
+        self.stream_max_age = stream_max_age
+        self.mids_max_age = mids_max_age
+        self.fallback_max_age = fallback_max_age
+
+        self._mids: Dict[str, float] = {}
+        self._mids_time = 0.0
+        self._last_resolved: Dict[str, ResolvedPrice] = {}
+        self.source_counts: Dict[str, int] = {SOURCE_STREAM: 0, SOURCE_ALL_MIDS: 0, SOURCE_L2_BOOK: 0}
+        self.stale_count = 0
+        self.failure_count = 0
+
+    def _from_stream(self, coin: str) -> Optional[ResolvedPrice]:
+        if self.stream is None:
+            return None
+        price = self.stream.latest_mids.get(coin)
+        observed_at = self.stream.last_mids_time
+        if price is None or time.time() - observed_at > self.stream_max_age:
+            return None
+        return ResolvedPrice(coin, price, SOURCE_STREAM, observed_at)
+
+    def _from_cached_mids(self, coin: str) -> Optional[ResolvedPrice]:
+        price = self._mids.get(coin)
+        if price is None or time.time() - self._mids_time > self.mids_max_age:
+            return None
+        return ResolvedPrice(coin, price, SOURCE_ALL_MIDS, self._mids_time)
+
+    async def _refresh_mids(self):
+        mids = await self.client.get_all_mids()
+        if mids is not None:
+            self._mids = mids
+            self._mids_time = time.time()
+
+    async def _from_l2_book(self, coin: str) -> Optional[ResolvedPrice]:
+        snapshot = await self.client.get_l2_snapshot(coin)
+        if snapshot is None or snapshot.mid is None:
+            return None
+        observed_at = snapshot.time / 1000 if snapshot.time else time.time()
+        return ResolvedPrice(coin, snapshot.mid, SOURCE_L2_BOOK, observed_at, book=snapshot)
+
+    def resolve_cached(self, coin: str) -> Optional[ResolvedPrice]:
+        """Resolve from memory only (stream or cached allMids), without any request"""
+        return self._from_stream(coin) or self._from_cached_mids(coin)
+
+    async def resolve(self, coin: str) -> Optional[ResolvedPrice]:
+        """Resolve a coin's price, falling back through the source tiers"""
+        resolved = self.resolve_cached(coin)
+        if resolved is None:
+            await self._refresh_mids()
+            resolved = self._from_cached_mids(coin)
+        if resolved is None:
+            resolved = await self._from_l2_book(coin)
+
+        if resolved is not None:
+            self.source_counts[resolved.source] += 1
+            self._last_resolved[coin] = resolved
+            return resolved
+
+        last = self._last_resolved.get(coin)
+        if last is not None and last.age_seconds <= self.fallback_max_age:
+            self.stale_count += 1
+            logger.warning(f"All price sources failed for {coin}, using {last.age_seconds:.0f}s old {last.source} price")
+            return last._replace(stale=True)
+        self.failure_count += 1
+        logger.error(f"Unable to resolve a price for {coin}")
+        return None
+
+    def get_status(self) -> Dict:
+        """Get per-source resolution counts"""
+        return {
+            'sources': dict(self.source_counts),
+            'stale': self.stale_count,
+            'failures': self.failure_count,
+            'mids_age_seconds': time.time() - self._mids_time if self._mids_time else None
+        }
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from typing import Dict
+import logging
+from config import RATE_LIMIT_WEIGHT_PER_MINUTE, RATE_LIMIT_MAX_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Request weights from the Hyperliquid API docs; unlisted info types weigh 20
+INFO_REQUEST_WEIGHTS = {
+    'l2Book': 2,
+    'allMids': 2,
+    'clearinghouseState': 2,
+    'orderStatus': 2,
+    'spotClearinghouseState': 2,
+    'exchangeStatus': 2,
+    'userRole': 60
+}
+DEFAULT_INFO_WEIGHT = 20
+CANDLE_ITEMS_PER_EXTRA_WEIGHT = 60  # candleSnapshot costs 1 more per 60 candles returned
+
+def request_weight(payload: Dict) -> int:
+    """Rate limit weight of an /info request payload"""
+    return INFO_REQUEST_WEIGHTS.get(payload.get('type'), DEFAULT_INFO_WEIGHT)
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would wait longer than the limiter allows"""
+
+class WeightedRateLimiter:
+    """Token bucket metering request weight against the exchange budget
+
+    The bucket holds up to ``capacity`` weight and refills continuously.
+    Requests that don't fit reserve their weight up front (the bucket goes
+    into debt) and wait in FIFO order for the refill, or are shed with
+    RateLimitExceeded if the wait, including the time queued behind
+    earlier reservations, would exceed ``max_wait``.
+    """
+
+    def __init__(self, capacity: float = RATE_LIMIT_WEIGHT_PER_MINUTE,
+                 refill_per_second: float = RATE_LIMIT_WEIGHT_PER_MINUTE / 60,
+                 max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_wait = max_wait
+        self.tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self.next_free_at = self._updated_at  # When the last reservation can go
+
+        self.acquired_weight = 0
+        self.waited_count = 0
+        self.total_wait_seconds = 0.0
+        self.shed_count = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        """Weight that can be spent right now without waiting (negative while reserved)"""
+        self._refill()
+        return self.tokens
+
+    async def acquire(self, weight: float = DEFAULT_INFO_WEIGHT):
+        """Take ``weight`` from the bucket, waiting for a refill if needed"""
+        self._refill()
+        # Weight reserved by callers still waiting is already deducted (tokens
+        # may be negative), so the wait includes the time queued behind them
+        now = time.monotonic()
+        wait = max(0.0, weight - self.tokens) / self.refill_per_second
+        if wait > self.max_wait:
+            self.shed_count += 1
+            raise RateLimitExceeded(
+                f"Rate limit budget exhausted (need {weight}, next free in {wait:.1f}s)"
+            )
+        self.tokens -= weight
+        self.next_free_at = now + wait
+        self.acquired_weight += weight
+        if wait <= 0:
+            return
+        self.waited_count += 1
+        self.total_wait_seconds += wait
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # Hand the reservation back so later callers don't wait for it
+            self._refill()
+            self.tokens += weight
+            self.acquired_weight -= weight
+            raise
+
+    def charge(self, weight: float):
+        """Deduct weight only known after the response (may go into debt)"""
+        self._refill()
+        self.tokens -= weight
+        self.acquired_weight += weight
+
+    def get_status(self) -> Dict:
+        """Get the current budget and limiter counters"""
+        return {
+            'available_weight': self.available,
+            'next_free_in_seconds': max(0.0, self.next_free_at - time.monotonic()),
+            'capacity': self.capacity,
+            'refill_per_second': self.refill_per_second,
+            'acquired_weight': self.acquired_weight,
+            'waited_count': self.waited_count,
+            'total_wait_seconds': self.total_wait_seconds,
+            'shed_count': self.shed_count
+        }
@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_SUB_BUCKET_BITS = 5  # 32 linear sub-buckets per power of two, ~3% relative error
+HISTOGRAM_MAX_MAGNITUDE = 36  # Track up to 2^36 microseconds (~19 hours)
+EXPORT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# (metric name with optional {labels}, type, help text, value)
+MetricSample = Tuple[str, str, str, float]
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations in microseconds
+
+    Values below 2 * 2^bits are counted exactly; above that each power of
+    two is split into 2^bits linear sub-buckets, so every recorded value
+    lands in a bucket within ~1/2^bits of itself. Recording is one bit
+    scan and a list increment; quantiles are computed on demand.
+    """
+
+    def __init__(self, sub_bucket_bits: int = HISTOGRAM_SUB_BUCKET_BITS,
+                 max_magnitude: int = HISTOGRAM_MAX_MAGNITUDE):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.max_value = (1 << max_magnitude) - 1
+        self.counts: List[int] = [0] * self._bucket_index(self.max_value) + [0]
+        self.total_count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _bucket_index(self, micros: int) -> int:
+        shift = micros.bit_length() - self.sub_bucket_bits - 1
+        if shift <= 0:
+            return micros
+        return (shift + 1) * self.sub_bucket_count + (micros >> shift) - self.sub_bucket_count
+
+    def _bucket_value(self, index: int) -> int:
+        """Highest value (in microseconds) that maps to a bucket"""
+        if index < 2 * self.sub_bucket_count:
+            return index
+        shift = index // self.sub_bucket_count - 1
+        mantissa = index % self.sub_bucket_count + self.sub_bucket_count
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        micros = min(max(int(seconds * 1_000_000), 0), self.max_value)
+        self.counts[self._bucket_index(micros)] += 1
+        self.total_count += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def quantiles(self, quantiles=EXPORT_QUANTILES) -> Dict[float, float]:
+        """Upper-bound estimates, in seconds, for each requested quantile"""
+        if not self.total_count:
+            return {q: 0.0 for q in quantiles}
+        cumulative = np.cumsum(self.counts)
+        result = {}
+        for q in quantiles:
+            index = int(np.searchsorted(cumulative, max(1, int(np.ceil(q * self.total_count)))))
+            result[q] = min(self._bucket_value(index) / 1_000_000, self.max_seconds)
+        return result
+
+    def mean(self) -> float:
+        return self.total_seconds / self.total_count if self.total_count else 0.0
+
+class EndpointMetrics:
+    """Latency, status, size and retry counters for one request type"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.status_counts: Dict[str, int] = defaultdict(int)
+        self.bytes_received = 0
+        self.retries = 0
+        self.inflight = 0
+
+    def get_summary(self) -> Dict:
+        quantiles = self.latency.quantiles()
+        return {
+            'requests': self.latency.total_count,
+            'mean_ms': self.latency.mean() * 1000,
+            'p50_ms': quantiles[0.5] * 1000,
+            'p90_ms': quantiles[0.9] * 1000,
+            'p99_ms': quantiles[0.99] * 1000,
+            'max_ms': self.latency.max_seconds * 1000,
+            'status': dict(self.status_counts),
+            'bytes_received': self.bytes_received,
+            'retries': self.retries,
+            'inflight': self.inflight
+        }
+
+class RequestMetrics:
+    """Per-endpoint request instrumentation for HyperliquidClient
+
+    Endpoints are keyed by the /info request type. Status is the HTTP code
+    as a string, or the exception class name for transport failures.
+    """
+
+    def __init__(self, namespace: str = "hyperliquid"):
+        self.namespace = namespace
+        self.started_at = time.time()
+        self._endpoints: Dict[str, EndpointMetrics] = defaultdict(EndpointMetrics)
+        self._collectors: List[Callable[[], List[MetricSample]]] = []
+        self._lock = threading.Lock()
+
+    def request_started(self, endpoint: str):
+        self._endpoints[endpoint].inflight += 1
+
+    def request_finished(self, endpoint: str, seconds: float, status: str, size: int = 0):
+        metrics = self._endpoints[endpoint]
+        metrics.inflight -= 1
+        metrics.latency.record(seconds)
+        metrics.status_counts[status] += 1
+        metrics.bytes_received += size
+
+    def record_retry(self, endpoint: str):
+        self._endpoints[endpoint].retries += 1
+
+    def add_collector(self, collect: Callable[[], List[MetricSample]]):
+        """Include the samples returned by ``collect()`` in every export"""
+        self._collectors.append(collect)
+
+    def get_summary(self, endpoint: Optional[str] = None) -> Dict:
+        """Latency quantiles and counters per endpoint (or for one endpoint)"""
+        if endpoint is not None:
+            return self._endpoints[endpoint].get_summary() if endpoint in self._endpoints else {}
+        return {name: metrics.get_summary() for name, metrics in sorted(self._endpoints.items())}
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_request_duration_seconds Upstream /info request latency",
+            f"# TYPE {ns}_request_duration_seconds summary"
+        ]
+        endpoints = sorted(self._endpoints.items())
+        for name, metrics in endpoints:
+            for q, value in metrics.latency.quantiles().items():
+                lines.append(f'{ns}_request_duration_seconds{{endpoint="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{ns}_request_duration_seconds_sum{{endpoint="{name}"}} {metrics.latency.total_seconds:.6f}')
+            lines.append(f'{ns}_request_duration_seconds_count{{endpoint="{name}"}} {metrics.latency.total_count}')
+
+        lines += [f"# HELP {ns}_requests_total Upstream /info requests by status",
+                  f"# TYPE {ns}_requests_total counter"]
+        for name, metrics in endpoints:
+            for status, count in sorted(metrics.status_counts.items()):
+                lines.append(f'{ns}_requests_total{{endpoint="{name}",status="{status}"}} {count}')
+
+        for metric, kind, help_text, attr in (
+            ('response_bytes_total', 'counter', 'Response body bytes received', 'bytes_received'),
+            ('retries_total', 'counter', 'Request retries', 'retries'),
+            ('inflight_requests', 'gauge', 'Requests currently awaiting a response', 'inflight')
+        ):
+            lines += [f"# HELP {ns}_{metric} {help_text}", f"# TYPE {ns}_{metric} {kind}"]
+            for name, metrics in endpoints:
+                lines.append(f'{ns}_{metric}{{endpoint="{name}"}} {getattr(metrics, attr)}')
+
+        described = set()
+        for collect in self._collectors:
+            try:
+                samples = collect()
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {e}")
+                continue
+            for metric, kind, help_text, value in samples:
+                base = metric.split('{', 1)[0]
+                if base not in described:
+                    described.add(base)
+                    lines += [f"# HELP {ns}_{base} {help_text}", f"# TYPE {ns}_{base} {kind}"]
+                lines.append(f"{ns}_{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> bool:
+        """Atomically write the exposition text for a node_exporter textfile collector"""
+        try:
+            tmp_path = f"{path}.tmp"
+            with self._lock:
+                with open(tmp_path, 'w') as f:
+                    f.write(self.to_prometheus())
+                os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing metrics to {path}: {e}")
+            return False
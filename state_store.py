@@ -0,0 +1,168 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+from config import (
+    STATE_DB_PATH,
+    STATE_DB_COMMIT_INTERVAL_SECONDS,
+    STATE_DB_MAX_BATCH
+)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    chat_id TEXT,
+    coin TEXT NOT NULL,
+    price REAL,
+    reason TEXT,
+    urgent INTEGER NOT NULL,
+    voice_sent INTEGER NOT NULL,
+    text_sent INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_time ON alerts (time);
+CREATE TABLE IF NOT EXISTS bot_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chat_settings (
+    chat_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (chat_id, key)
+);
+"""
+
+_STOP = object()
+
+class StateStore:
+    """SQLite (WAL mode) persistence for alerter and chat state
+
+    Holds the alert log, bot state such as the alert cooldown, and per-chat
+    settings; price history lives in the TickStore. Writes are queued and
+    applied by a background thread that commits everything pending in one
+    transaction (group commit), at most every ``commit_interval`` seconds,
+    so callers on the event loop never wait for disk. Values in bot_state and chat_settings are JSON-encoded.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH,
+                 commit_interval: float = STATE_DB_COMMIT_INTERVAL_SECONDS,
+                 max_batch: int = STATE_DB_MAX_BATCH):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self.commit_count = 0
+        self.write_count = 0
+        self.error_count = 0
+        self._thread = threading.Thread(target=self._writer, name="state-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a crash can't corrupt the database
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _writer(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            batch: List[Tuple[str, tuple]] = [self._queue.get()]
+            deadline = time.monotonic() + self.commit_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+            try:
+                with conn:
+                    for sql, params in batch:
+                        conn.execute(sql, params)
+                self.commit_count += 1
+                self.write_count += len(batch)
+            except Exception as e:
+                self.error_count += 1
+                logger.error(f"Error committing {len(batch)} state writes: {e}")
+            for _ in range(len(batch) + (1 if stopping else 0)):
+                self._queue.task_done()
+        conn.close()
+
+    def _write(self, sql: str, params: tuple = ()):
+        self._queue.put((sql, params))
+
+    def record_alert(self, coin: str, price: Optional[float], reason: str, urgent: bool,
+                     voice_sent: bool, text_sent: bool, chat_id: Optional[str] = None):
+        self._write("INSERT INTO alerts (time, chat_id, coin, price, reason, urgent, voice_sent, text_sent) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (time.time(), chat_id, coin, price, reason, int(urgent), int(voice_sent), int(text_sent)))
+
+    def set_state(self, key: str, value: Any):
+        self._write("INSERT OR REPLACE INTO bot_state (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def set_chat_setting(self, chat_id: str, key: str, value: Any):
+        self._write("INSERT OR REPLACE INTO chat_settings (chat_id, key, value) VALUES (?, ?, ?)",
+                    (str(chat_id), key, json.dumps(value)))
+
+    def restore(self) -> Dict:
+        """Read the working state back in one read transaction
+
+        Returns {'state': {key: value}, 'chat_settings': {chat_id: {key: value}}}.
+        """
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")
+            state = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM bot_state")}
+            chat_settings: Dict[str, Dict[str, Any]] = {}
+            for chat_id, key, value in conn.execute("SELECT chat_id, key, value FROM chat_settings"):
+                chat_settings.setdefault(chat_id, {})[key] = json.loads(value)
+            conn.execute("COMMIT")
+        return {'state': state, 'chat_settings': chat_settings}
+
+    def recent_alerts(self, limit: int = 10) -> List[Dict]:
+        """Most recent alert log entries, newest first"""
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM alerts ORDER BY time DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued write is committed (or ``timeout`` passes)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        """Commit pending writes and stop the writer thread"""
+        self._queue.put(_STOP)
+        self._thread.join(timeout=10)
+
+    def get_status(self) -> Dict:
+        return {
+            'pending_writes': self._queue.qsize(),
+            'writes': self.write_count,
+            'commits': self.commit_count,
+            'errors': self.error_count
+        }
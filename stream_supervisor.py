@@ -0,0 +1,182 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+import logging
+from config import (
+    STREAM_STALE_SECONDS,
+    STREAM_HEARTBEAT_TIMEOUT_SECONDS,
+    STREAM_GAP_BACKFILL_SECONDS,
+    STREAM_BACKFILL_INTERVAL
+)
+from hyperliquid_client import CANDLE_INTERVAL_MS
+from request_metrics import MetricSample
+
+logger = logging.getLogger(__name__)
+
+class StreamSupervisor:
+    """Keeps an allMids subscription healthy and its tick history gap-free
+
+    Sits between HyperliquidStream and the consumer of ``on_mids``. A
+    watchdog forces a reconnect when no message has arrived within
+    ``heartbeat_timeout``. After a reconnect, if the last tick is older
+    than ``min_gap``, the missing interval is backfilled from candle
+    closes and delivered before the live ticks that arrived meanwhile,
+    so consumers see one continuous, ordered series.
+    """
+
+    def __init__(self, stream, client, coins: List[str],
+                 on_mids: Callable[[Dict[str, float]], None],
+                 heartbeat_timeout: float = STREAM_HEARTBEAT_TIMEOUT_SECONDS,
+                 min_gap: float = STREAM_GAP_BACKFILL_SECONDS,
+                 backfill_interval: str = STREAM_BACKFILL_INTERVAL,
+                 on_backfill: Optional[Callable[[Dict[str, float], float], None]] = None,
+                 stale_after: float = STREAM_STALE_SECONDS):
+        self.stream = stream
+        self.client = client
+        self.coins = list(coins)
+        self.on_mids = on_mids
+        self.heartbeat_timeout = heartbeat_timeout
+        self.min_gap = min_gap
+        self.backfill_interval = backfill_interval
+        self.stale_after = stale_after
+        # Backfilled history may need to bypass live-tick processing such as conflation;
+        # it is called with each candle's close time (epoch seconds)
+        self.on_backfill = on_backfill or (lambda mids, timestamp: on_mids(mids))
+
+        self._watchdog: Optional[asyncio.Task] = None
+        self._backfill_task: Optional[asyncio.Task] = None
+        self._buffered: List[Dict[str, float]] = []
+        self._seen_connect_count = 0
+        self.last_tick_time = 0.0
+
+        self.forced_reconnects = 0
+        self.gap_count = 0
+        self.total_gap_seconds = 0.0
+        self.last_gap_seconds = 0.0
+        self.max_gap_seconds = 0.0
+        self.backfilled_points = 0
+        self.backfill_failures = 0
+
+    def start(self):
+        """Subscribe to allMids and start the stale-stream watchdog"""
+        self.stream.subscribe_all_mids(self._on_stream_mids)
+        self._watchdog = asyncio.create_task(self._watch())
+
+    def stop(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+
+    async def _watch(self):
+        """Force a reconnect when a connected stream goes silent"""
+        while True:
+            await asyncio.sleep(min(self.heartbeat_timeout / 3, 5.0))
+            last_message = self.stream.last_message_time
+            if (self.stream.is_connected and last_message and
+                    time.time() - last_message > self.heartbeat_timeout):
+                self.forced_reconnects += 1
+                logger.warning(f"No stream messages for {time.time() - last_message:.0f}s, forcing reconnect")
+                self.stream.reconnect()
+
+    def _on_stream_mids(self, mids: Dict[str, float]):
+        now = time.time()
+        reconnected = self.stream.connect_count != self._seen_connect_count
+        self._seen_connect_count = self.stream.connect_count
+
+        if self._backfill_task is not None and not self._backfill_task.done():
+            self._buffered.append(mids)
+            return
+
+        gap = now - self.last_tick_time if self.last_tick_time else 0.0
+        if reconnected and gap > self.min_gap:
+            self._record_gap(gap)
+            self._buffered = [mids]
+            self._backfill_task = asyncio.create_task(self._backfill(self.last_tick_time, now))
+            return
+
+        self.last_tick_time = now
+        self.on_mids(mids)
+
+    def gap_open(self) -> bool:
+        """Whether ticks for the time since the last live one may still be backfilled
+
+        True while the stream is down or has been silent for longer than
+        ``stale_after``, and while a backfill is running.
+        """
+        if self._backfill_task is not None and not self._backfill_task.done():
+            return True
+        if not self.last_tick_time:
+            return False
+        return not self.stream.is_connected or time.time() - self.last_tick_time > self.stale_after
+
+    def _record_gap(self, gap: float):
+        self.gap_count += 1
+        self.total_gap_seconds += gap
+        self.last_gap_seconds = gap
+        self.max_gap_seconds = max(self.max_gap_seconds, gap)
+        logger.warning(f"Stream gap of {gap:.0f}s detected, backfilling from candles")
+
+    async def _backfill(self, gap_start: float, gap_end: float):
+        """Deliver candle closes covering the gap, then the buffered live ticks"""
+        try:
+            start_ms, end_ms = int(gap_start * 1000), int(gap_end * 1000)
+            interval_ms = CANDLE_INTERVAL_MS[self.backfill_interval]
+            closes_by_time: Dict[int, Dict[str, float]] = {}
+            for coin in self.coins:
+                candles = await self.client.get_candles(coin, self.backfill_interval,
+                                                        start_time=start_ms, end_time=end_ms)
+                if candles is None:
+                    self.backfill_failures += 1
+                    continue
+                # A close is the price at the end of its candle (the API's close time 'T');
+                # the candle still open at gap_end is left to the buffered live ticks
+                for open_time, close in zip(candles['time'].tolist(), candles['close'].tolist()):
+                    close_time = open_time + interval_ms - 1
+                    if start_ms < close_time < end_ms:
+                        closes_by_time.setdefault(close_time, {})[coin] = close
+            for close_time in sorted(closes_by_time):
+                self.on_backfill(closes_by_time[close_time], close_time / 1000)
+                self.backfilled_points += 1
+        except Exception as e:
+            self.backfill_failures += 1
+            logger.error(f"Error backfilling stream gap: {e}")
+        finally:
+            buffered, self._buffered = self._buffered, []
+            for mids in buffered:
+                self.on_mids(mids)
+            self.last_tick_time = time.time()
+
+    def get_metric_samples(self) -> List[MetricSample]:
+        """Connection and gap counters for the metrics export"""
+        samples: List[MetricSample] = [
+            ('stream_connected', 'gauge', 'Whether the price stream is connected', int(self.stream.is_connected)),
+            ('stream_forced_reconnects_total', 'counter', 'Reconnects forced by the stale-stream watchdog',
+             self.forced_reconnects),
+            ('stream_gaps_total', 'counter', 'Stream gaps long enough to backfill', self.gap_count),
+            ('stream_gap_seconds_total', 'counter', 'Total duration of backfilled stream gaps',
+             self.total_gap_seconds),
+            ('stream_last_gap_seconds', 'gauge', 'Duration of the most recent stream gap', self.last_gap_seconds),
+            ('stream_max_gap_seconds', 'gauge', 'Longest stream gap seen', self.max_gap_seconds),
+            ('stream_backfilled_points_total', 'counter', 'Candle closes delivered to fill gaps',
+             self.backfilled_points),
+            ('stream_backfill_failures_total', 'counter', 'Failed gap backfills', self.backfill_failures)
+        ]
+        if self.last_tick_time:
+            samples.append(('stream_seconds_since_tick', 'gauge', 'Age of the last live tick',
+                            time.time() - self.last_tick_time))
+        return samples
+
+    def get_status(self) -> Dict:
+        """Get reconnect and gap metrics"""
+        return {
+            'stream': self.stream.get_status(),
+            'forced_reconnects': self.forced_reconnects,
+            'gap_count': self.gap_count,
+            'total_gap_seconds': self.total_gap_seconds,
+            'last_gap_seconds': self.last_gap_seconds,
+            'max_gap_seconds': self.max_gap_seconds,
+            'backfilled_points': self.backfilled_points,
+            'backfill_failures': self.backfill_failures,
+            'seconds_since_tick': time.time() - self.last_tick_time if self.last_tick_time else None
+        }
@@ -3,9 +3,40 @@ import asyncio
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 from datetime import datetime
+from typing import Dict, Optional, Tuple
 import json
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, UPDATE_INTERVAL_MINUTES, ALERT_THRESHOLD
+import time
+import numpy as np
+from config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_CHAT_ID,
+    UPDATE_INTERVAL_MINUTES,
+    ALERT_THRESHOLD,
+    TRACKED_ASSET,
+    ENABLE_PRICE_STREAM,
+    ENABLE_ORDER_BOOK,
+    PRICE_HISTORY_WINDOW,
+    HISTORY_INTERVAL,
+    AGGREGATOR_INTERVALS,
+    ENABLE_INGESTION_PROCESS,
+    ENABLE_TICK_STORE,
+    TICK_STORE_MAX_RESTORE_AGE_SECONDS,
+    ENABLE_STATE_DB,
+    RECORD_TRAFFIC,
+    METRICS_EXPORT_PATH,
+    METRICS_EXPORT_INTERVAL_SECONDS
+)
 from hyperliquid_client import HyperliquidClient
+from hyperliquid_stream import HyperliquidStream
+from order_book import OrderBookManager
+from traffic_recorder import TrafficRecorder
+from stream_supervisor import StreamSupervisor
+from ingestion_worker import IngestionProcess
+from tick_conflator import TickConflator
+from candle_aggregator import CandleAggregator, BAR_INTERVAL_MS
+from tick_store import TickStore
+from state_store import StateStore
+from price_resolver import PriceResolver, ResolvedPrice, SOURCE_STREAM
 from price_analyzer import PriceAnalyzer
 from telegram_alerter import TelegramAlerter
 
@@ -18,11 +49,44 @@ logger = logging.getLogger(__name__)
 
 class HypeBot:
     def __init__(self):
-        self.hyperliquid_client = HyperliquidClient()
+        self.recorder = TrafficRecorder() if RECORD_TRAFFIC else None
+        self.hyperliquid_client = HyperliquidClient(recorder=self.recorder)
         self.price_analyzer = PriceAnalyzer()
+        self.tick_store = TickStore() if ENABLE_TICK_STORE else None
+        self.state_db = StateStore() if ENABLE_STATE_DB else None
+        self.chat_settings: Dict[str, Dict] = {}
         self.telegram_alerter = TelegramAlerter()
+        # Either stream in a worker process via shared memory, or on this event loop
+        self.ingestion = IngestionProcess([TRACKED_ASSET]) if ENABLE_INGESTION_PROCESS else None
+        self.price_stream = None
+        if ENABLE_PRICE_STREAM and self.ingestion is None:
+            self.price_stream = HyperliquidStream(recorder=self.recorder)
+        # Live ticks build bars unfiltered; the analyzer's window takes the closed
+        # HISTORY_INTERVAL bars, while thinned ticks only move its current price
+        self.tick_conflator = TickConflator(self._on_stream_mids, coins=[TRACKED_ASSET])
+        self.candle_aggregator = CandleAggregator(
+            coins=[TRACKED_ASSET], intervals=dict.fromkeys(AGGREGATOR_INTERVALS + (HISTORY_INTERVAL,))
+        )
+        self.candle_aggregator.subscribe(self._on_analysis_bar, coin=TRACKED_ASSET, interval=HISTORY_INTERVAL)
+        self.stream_supervisor = None
+        if self.price_stream is not None:
+            self.stream_supervisor = StreamSupervisor(
+                self.price_stream, self.hyperliquid_client, [TRACKED_ASSET],
+                self._on_live_mids, on_backfill=self._on_backfill_mids
+            )
+            self.hyperliquid_client.metrics.add_collector(self.stream_supervisor.get_metric_samples)
+            # Bars spanning a stream outage wait for its backfill instead of closing flat
+            self.candle_aggregator.hold = self.stream_supervisor.gap_open
+        self.price_resolver = PriceResolver(self.hyperliquid_client, self.ingestion or self.price_stream)
+        self.last_resolved_price: Optional[ResolvedPrice] = None
+        self.order_books = None
+        if self.price_stream is not None and ENABLE_ORDER_BOOK:
+            self.order_books = OrderBookManager(self.hyperliquid_client, self.price_stream)
         self.last_alert_time = None
         self.is_running = False
+        self.monitor_context = None
+        self._stream_alert_task = None
+        self._metrics_export_task = None
         
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -35,6 +99,8 @@ Commands:
 /start - Show this message
 /status - Show current price and analysis
 /settings - Show current settings
+/api - Show API latency by endpoint
+/updates on|off - Turn regular updates on or off
 /help - Show help information
 
 I'll send you updates every 30 minutes and CRITICAL alerts immediately when the price is likely to drop below $41.
@@ -45,14 +111,11 @@ I'll send you updates every 30 minutes and CRITICAL alerts immediately when the
         """Handle /status command"""
         try:
             # Get current price
-            current_price = self.hyperliquid_client.get_asset_price()
+            current_price = await self._get_current_price()
             if current_price is None:
                 await update.message.reply_text("❌ Unable to fetch current price. Please try again later.")
                 return
             
-            # Add price to analyzer
-            self.price_analyzer.add_price(current_price)
-            
             # Get analysis
             analysis = self.price_analyzer.get_analysis_summary()
             
@@ -90,6 +153,52 @@ To change settings, modify the config.py file and restart the bot.
         """
         await update.message.reply_text(settings_message, parse_mode='HTML')
     
+    async def api_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /api command"""
+        endpoints = self.hyperliquid_client.metrics.get_summary()
+        if not endpoints:
+            await update.message.reply_text("No API requests made yet.")
+            return
+        
+        lines = ["📡 <b>API Latency</b> (p50 / p99 / max)\n"]
+        for endpoint, stats in endpoints.items():
+            errors = sum(count for status, count in stats['status'].items() if status != '200')
+            lines.append(f"• <b>{endpoint}</b>: {stats['p50_ms']:.0f} / {stats['p99_ms']:.0f} / "
+                         f"{stats['max_ms']:.0f} ms, {stats['requests']} reqs, "
+                         f"{errors} errors, {stats['retries']} retries")
+        limit = self.hyperliquid_client.rate_limiter.get_status()
+        breaker = self.hyperliquid_client.circuit_breaker.get_status()
+        lines.append(f"\n⏱ <b>Rate limit:</b> {limit['available_weight']:.0f}/{limit['capacity']} weight available, "
+                     f"{limit['shed_count']} shed · circuit {breaker['state'].replace('_', '-')}")
+        ticks =self.tick_conflator.get_status()
+        if ticks['received_ticks']:
+            lines.append(f"\n📉 <b>Ticks:</b> {ticks['forwarded_ticks']} of {ticks['received_ticks']} analyzed "
+                         f"({ticks['removed_ratio']:.0%} conflated or below threshold)")
+        connections = self.hyperliquid_client.get_connection_stats()
+        if connections['reuse_ratio'] is not None:
+            lines.append(f"\n🔌 <b>Connections:</b> {connections['new_connections']} opened, "
+                         f"{connections['reuse_ratio']:.0%} reuse")
+        await update.message.reply_text("\n".join(lines), parse_mode='HTML')
+    
+    async def updates_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /updates command"""
+        chat_id = str(update.effective_chat.id)
+        if not context.args or context.args[0].lower() not in ('on', 'off'):
+            enabled = self._chat_setting(chat_id, 'regular_updates', True)
+            await update.message.reply_text(f"Regular updates are {'on' if enabled else 'off'}. Use /updates on or /updates off.")
+            return
+        enabled = context.args[0].lower() == 'on'
+        self._set_chat_setting(chat_id, 'regular_updates', enabled)
+        await update.message.reply_text(f"✅ Regular updates turned {'on' if enabled else 'off'}. Alerts are always sent.")
+    
+    def _chat_setting(self, chat_id: str, key: str, default=None):
+        return self.chat_settings.get(str(chat_id), {}).get(key, default)
+    
+    def _set_chat_setting(self, chat_id: str, key: str, value):
+        self.chat_settings.setdefault(str(chat_id), {})[key] = value
+        if self.state_db is not None:
+            self.state_db.set_chat_setting(chat_id, key, value)
+    
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command"""
         help_message = """
@@ -114,6 +223,8 @@ To change settings, modify the config.py file and restart the bot.
 /start - Welcome message
 /status - Current price and analysis
 /settings - Bot configuration
+/api - API latency and error counts
+/updates on|off - Turn regular updates on or off for this chat
 /testvoice - Test voice message functionality
 /help - This help message
 
@@ -164,6 +275,30 @@ To change settings, modify the config.py file and restart the bot.
 ⏰ <b>Last Updated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         """
         
+        resolved = self.last_resolved_price
+        if resolved is not None:
+            message += f"\n🛰 <b>Source:</b> {resolved.source}, {resolved.age_seconds:.1f}s old"
+            if resolved.stale:
+                message += " ⚠️ stale"
+        
+        bar_changes = []
+        for interval in ('1m', '5m', '1h'):
+            bars = self.candle_aggregator.get_bars(TRACKED_ASSET, interval, 1)
+            if bars is not None and len(bars['close']) and bars['open'][-1]:
+                bar_changes.append(f"{interval} {bars['close'][-1] / bars['open'][-1] - 1:+.2%}")
+        if bar_changes:
+            message += f"\n🕯 <b>Last bars:</b> {' · '.join(bar_changes)}"
+        
+        book = self.order_books.get_book(TRACKED_ASSET) if self.order_books is not None else None
+        if book is not None and book.spread is not None:
+            message += f"\n📖 <b>Book:</b> ${book.best_bid:.2f} / ${book.best_ask:.2f} (spread ${book.spread:.4f})"
+        
+        liquidity = analysis.get('liquidity')
+        if liquidity and liquidity['imbalance'] is not None:
+            message += (f"\n💧 <b>Liquidity (±{liquidity['depth_bps']}bps):</b> "
+                        f"{liquidity['bid_depth']:.2f} bid / {liquidity['ask_depth']:.2f} ask, "
+                        f"imbalance {liquidity['imbalance']:+.2f}")
+        
         if should_alert:
             alert_info = analysis['alert_info']
             reason = alert_info.get('reason', 'unknown')
@@ -194,10 +329,157 @@ To change settings, modify the config.py file and restart the bot.
                 logger.info(f"{'CRITICAL' if is_urgent else 'Regular'} text alert sent successfully")
             else:
                 logger.info("Text alert skipped (cooldown or disabled)")
+            
+            if self.state_db is not None and (voice_sent or text_sent):
+                self.state_db.set_state('last_alert_time', self.telegram_alerter.last_alert_time.isoformat())
+                self.state_db.record_alert(TRACKED_ASSET, analysis.get('current_price'),
+                                           analysis.get('alert_info', {}).get('reason', 'unknown'),
+                                           is_urgent, voice_sent, text_sent, TELEGRAM_CHAT_ID)
                 
         except Exception as e:
             logger.error(f"Error sending alert: {e}")
     
+    async def _get_current_price(self) -> Optional[float]:
+        """Get the tracked asset's price from the freshest available source
+        
+        Streamed prices already reach the analyzer, so only newly fetched
+        REST prices are added here.
+        """
+        book = self.order_books.get_book(TRACKED_ASSET) if self.order_books is not None else None
+        if book is not None and book.snapshot is not None:
+            self.price_analyzer.update_liquidity(book.snapshot)
+        
+        resolved = await self.price_resolver.resolve(TRACKED_ASSET)
+        if resolved is None:
+            return None
+        
+        previous = self.last_resolved_price
+        is_new = previous is None or (resolved.source, resolved.observed_at) != (previous.source, previous.observed_at)
+        if resolved.source != SOURCE_STREAM and not resolved.stale and is_new:
+            self._add_price(resolved.price, resolved.source, resolved.observed_at)
+            if resolved.book is not None:
+                self.price_analyzer.update_liquidity(resolved.book)
+        self.last_resolved_price = resolved
+        return resolved.price
+    
+    def _on_live_mids(self, mids: Dict[str, float]):
+        """Route each live tick batch to the bar aggregator and the conflator"""
+        source = self.ingestion or self.price_stream
+        self.candle_aggregator.on_tick_batch(mids, source.last_mids_time or None)
+        self.tick_conflator.on_tick_batch(mids)
+    
+    def _on_analysis_bar(self, coin: str, interval: str, bar: Dict):
+        """Add each closed HISTORY_INTERVAL bar to the analyzer's window"""
+        self.price_analyzer.add_price(bar['close'])
+    
+    def _add_price(self, price: float, source: str, timestamp: Optional[float] = None):
+        """Make a price the analyzer's current price and persist it for the next restart"""
+        if source != SOURCE_STREAM:
+            # Live ticks already reach the aggregator unconflated in _on_live_mids
+            self.candle_aggregator.on_tick_batch({TRACKED_ASSET: price}, timestamp)
+            # and the conflator must compare the next live tick against this price
+            self.tick_conflator.set_reference({TRACKED_ASSET: price})
+        self.price_analyzer.set_current_price(price)
+        self._store_price(price, source, timestamp)
+    
+    def _store_price(self, price: float, source: str, timestamp: Optional[float] = None):
+        if self.tick_store is not None:
+            self.tick_store.append(TRACKED_ASSET, price, timestamp, source)
+            self.tick_store.flush()
+    
+    def _restore_state(self):
+        """Reload the alert cooldown and chat settings from the state database"""
+        if self.state_db is None:
+            return
+        state = self.state_db.restore()
+        last_alert_time = state['state'].get('last_alert_time')
+        if last_alert_time:
+            self.telegram_alerter.last_alert_time = datetime.fromisoformat(last_alert_time)
+        self.chat_settings = state['chat_settings']
+    
+    async def _fill_stored_history(self):
+        """Store candle closes for the time since the last stored tick, e.g. while the bot was down
+
+        Without them restored bars from before a restart would sit right
+        next to live ones in the analyzer's window.
+        """
+        if self.tick_store is None:
+            return
+        now_ms = int(time.time() * 1000)
+        last = self.tick_store.last(TRACKED_ASSET, 1)
+        if not len(last) or last['time'][-1] < now_ms - TICK_STORE_MAX_RESTORE_AGE_SECONDS * 1000:
+            return
+        last_ms = int(last['time'][-1])
+        interval_ms = BAR_INTERVAL_MS[HISTORY_INTERVAL]
+        # From the open of the last stored tick's bar, whose close came later
+        candles = await self.hyperliquid_client.get_candles(TRACKED_ASSET, HISTORY_INTERVAL,
+                                                            start_time=last_ms - last_ms % interval_ms,
+                                                            end_time=now_ms)
+        if candles is None:
+            return
+        # Each close is stamped at its candle's close time, so it ends up in the
+        # bar it closed; the candle still open now is left to live ticks
+        close_times = candles['time'] + interval_ms - 1
+        filled = (close_times > last_ms) & (close_times < now_ms)
+        if filled.any():
+            self.tick_store.append_many(TRACKED_ASSET, close_times[filled], candles['close'][filled], 'candle')
+            self.tick_store.flush()
+            logger.info(f"Stored {int(filled.sum())} {HISTORY_INTERVAL} closes for {TRACKED_ASSET} "
+                        f"since the last stored tick")
+    
+    def _restore_history(self) -> Tuple[int, Optional[float]]:
+        """Rebuild the analyzer's bar closes from ticks in the tick store
+
+        Returns how many closes were restored and the open time of the
+        oldest one (epoch seconds).
+        """
+        if self.tick_store is None:
+            return 0, None
+        now = time.time()
+        ticks = self.tick_store.read_range(TRACKED_ASSET, start=now - TICK_STORE_MAX_RESTORE_AGE_SECONDS)
+        if not len(ticks):
+            return 0, None
+        interval_ms = BAR_INTERVAL_MS[HISTORY_INTERVAL]
+        bars = ticks['time'] // interval_ms
+        # A bar's close is its last tick; only bars that have ended count
+        last_ticks = np.append(np.flatnonzero(bars[1:] != bars[:-1]), len(ticks) - 1)
+        closed = last_ticks[(bars[last_ticks] + 1) * interval_ms <= now * 1000][-PRICE_HISTORY_WINDOW:]
+        self.price_analyzer.load_history(ticks['price'][closed].tolist())
+        if not (bars[-1] + 1) * interval_ms <= now * 1000:
+            # The last stored bar is still open; carry it on in the aggregator
+            price = float(ticks['price'][-1])
+            self.candle_aggregator.on_tick_batch({TRACKED_ASSET: price}, ticks['time'][-1] / 1000)
+            self.price_analyzer.set_current_price(price)
+        logger.info(f"Restored {len(closed)} {HISTORY_INTERVAL} closes from {len(ticks)} stored ticks for {TRACKED_ASSET}")
+        return len(closed), bars[closed[0]] * interval_ms / 1000 if len(closed) else None
+    
+    def _on_stream_mids(self, mids: Dict[str, float]):
+        """Feed streamed prices into the analyzer and alert as soon as needed"""
+        price = mids.get(TRACKED_ASSET)
+        if price is None:
+            return
+        self._add_price(price, SOURCE_STREAM)
+        
+        if self.monitor_context is None:
+            return
+        # Let an in-flight alert finish so cooldowns are respected
+        if self._stream_alert_task is not None and not self._stream_alert_task.done():
+            return
+        should_alert, _ = self.price_analyzer.should_alert()
+        if should_alert:
+            analysis = self.price_analyzer.get_analysis_summary()
+            self._stream_alert_task = asyncio.create_task(self.send_alert(self.monitor_context, analysis))
+    
+    def _on_backfill_mids(self, mids: Dict[str, float], timestamp: float):
+        """Add candle closes that fill a stream gap to the bars and the tick store
+
+        They are history: they neither move the current price nor alert.
+        """
+        price = mids.get(TRACKED_ASSET)
+        if price is not None:
+            self.candle_aggregator.on_tick_batch({TRACKED_ASSET: price}, timestamp)
+            self._store_price(price, 'candle', timestamp)
+    
     async def send_regular_update(self, context: ContextTypes.DEFAULT_TYPE):
         """Send regular price update"""
         if not TELEGRAM_CHAT_ID:
@@ -205,14 +487,11 @@ To change settings, modify the config.py file and restart the bot.
         
         try:
             # Get current price
-            current_price = self.hyperliquid_client.get_asset_price()
+            current_price = await self._get_current_price()
             if current_price is None:
                 logger.warning("Unable to fetch price for regular update")
                 return
             
-            # Add price to analyzer
-            self.price_analyzer.add_price(current_price)
-            
             # Get analysis
             analysis = self.price_analyzer.get_analysis_summary()
             
@@ -220,6 +499,9 @@ To change settings, modify the config.py file and restart the bot.
             if analysis['should_alert']:
                 await self.send_alert(context, analysis)
             
+            if not self._chat_setting(TELEGRAM_CHAT_ID, 'regular_updates', True):
+                return
+            
             # Send regular update
             update_message = self._format_status_message(analysis)
             await context.bot.send_message(
@@ -236,8 +518,42 @@ To change settings, modify the config.py file and restart the bot.
     async def start_monitoring(self, context: ContextTypes.DEFAULT_TYPE):
         """Start the monitoring loop with frequent updates"""
         self.is_running = True
+        self.monitor_context = context
         logger.info("Starting price monitoring with frequent updates...")
         
+        # Open pooled connections now so the first /status doesn't pay for the handshakes
+        await self.hyperliquid_client.warm_up()
+        self.hyperliquid_client.start_keep_alive()
+        
+        self._restore_state()
+        
+        # Start hot: fill the stored history up to now, restore its bars, and top up
+        # with candle closes from before them
+        await self._fill_stored_history()
+        restored, oldest = self._restore_history()
+        if restored < PRICE_HISTORY_WINDOW:
+            history = await self.hyperliquid_client.get_price_history(
+                TRACKED_ASSET, PRICE_HISTORY_WINDOW - restored, HISTORY_INTERVAL,
+                end_time=int((oldest if oldest is not None else time.time()) * 1000)
+            )
+            if history:
+                self.price_analyzer.load_history(history)
+                logger.info(f"Loaded {len(history)} historical prices for {TRACKED_ASSET}")
+        
+        if self.price_stream is not None:
+            self.price_stream.loop = asyncio.get_running_loop()
+            self.stream_supervisor.start()
+            if self.order_books is not None:
+                self.order_books.track(TRACKED_ASSET)
+            self.price_stream.start()
+        if self.ingestion is not None:
+            self.ingestion.start(self._on_live_mids)
+        # Bars close on their boundary even when prices only arrive by polling
+        self.candle_aggregator.start()
+        
+        if METRICS_EXPORT_PATH:
+            self._metrics_export_task = asyncio.create_task(self._export_metrics())
+        
         while self.is_running:
             try:
                 await self.send_regular_update(context)
@@ -246,11 +562,36 @@ To change settings, modify the config.py file and restart the bot.
                 logger.error(f"Error in monitoring loop: {e}")
                 await asyncio.sleep(60)  # Wait 1 minute before retrying
     
+    async def _export_metrics(self):
+        """Periodically write client metrics for a Prometheus textfile collector"""
+        while self.is_running:
+            self.hyperliquid_client.metrics.write_prometheus(METRICS_EXPORT_PATH)
+            await asyncio.sleep(METRICS_EXPORT_INTERVAL_SECONDS)
+    
     def stop_monitoring(self):
         """Stop the monitoring loop"""
         self.is_running = False
         logger.info("Stopping price monitoring...")
     
+    async def shutdown(self, application: Application):
+        """Stop monitoring and release pooled API connections"""
+        self.stop_monitoring()
+        if self._metrics_export_task is not None:
+            self._metrics_export_task.cancel()
+        self.candle_aggregator.stop()
+        if self.price_stream is not None:
+            self.stream_supervisor.stop()
+            self.price_stream.stop()
+        if self.ingestion is not None:
+            self.ingestion.stop()
+        await self.hyperliquid_client.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.tick_store is not None:
+            self.tick_store.close()
+        if self.state_db is not None:
+            self.state_db.close()
+    
     async def test_voice_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /testvoice command"""
         try:
@@ -300,12 +641,14 @@ async def main():
     bot = HypeBot()
     
     # Create application
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    application = Application.builder().token(TELEGRAM_BOT_TOKEN).post_shutdown(bot.shutdown).build()
     
     # Add command handlers
     application.add_handler(CommandHandler("start", bot.start_command))
     application.add_handler(CommandHandler("status", bot.status_command))
     application.add_handler(CommandHandler("settings", bot.settings_command))
+    application.add_handler(CommandHandler("api", bot.api_command))
+    application.add_handler(CommandHandler("updates", bot.updates_command))
     application.add_handler(CommandHandler("help", bot.help_command))
     application.add_handler(CommandHandler("testvoice", bot.test_voice_command))
     
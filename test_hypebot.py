@@ -0,0 +1,667 @@
+import asyncio
+import multiprocessing
+import time
+from contextlib import asynccontextmanager
+import httpx
+import numpy as np
+import pytest
+from candle_aggregator import BarSeries, CandleAggregator
+from circuit_breaker import CircuitBreaker, CircuitOpenError, OPEN
+from hyperliquid_client import HyperliquidClient
+from hyperliquid_stream import HyperliquidStream
+from json_codec import decode_ws_message, loads, ws_channel_data
+from mock_hyperliquid import MockHyperliquidServer
+from order_book import BID, ASK, L2Snapshot
+from price_resolver import PriceResolver, SOURCE_STREAM, SOURCE_ALL_MIDS, SOURCE_L2_BOOK
+from rate_limiter import WeightedRateLimiter, RateLimitExceeded
+from request_metrics import LatencyHistogram
+from state_store import StateStore
+from stream_supervisor import StreamSupervisor
+from tick_ring import TickRing, _CLAIM_SEQ
+from tick_store import TickStore
+
+@asynccontextmanager
+async def mock_api(**kwargs):
+    """A MockHyperliquidServer on an ephemeral port and a client pointed at it"""
+    client_kwargs = kwargs.pop('client', {})
+    server = MockHyperliquidServer(port=0, **kwargs)
+    await server.start()
+    client = HyperliquidClient(base_url=server.base_url, **client_kwargs)
+    try:
+        yield server, client
+    finally:
+        await client.close()
+        await server.stop()
+
+async def wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("condition not met")
+        await asyncio.sleep(0.02)
+
+def test_rate_limiter_sheds_queued_burst():
+    """Time spent queued behind earlier waiters counts towards max_wait"""
+    limiter = WeightedRateLimiter(capacity=40, refill_per_second=40, max_wait=0.6)
+
+    async def request():
+        started = time.monotonic()
+        try:
+            await limiter.acquire(20)
+        except RateLimitExceeded:
+            return None
+        return time.monotonic() - started
+
+    async def burst():
+        return await asyncio.gather(*(request() for _ in range(8)))
+
+    waits = asyncio.run(burst())
+    served = [wait for wait in waits if wait is not None]
+    assert limiter.shed_count == 8 - len(served) > 0
+    assert max(served) <= 0.6 + 0.1
+    # Two fit the bucket, the rest are spaced 0.5s apart by the refill
+    assert len(served) == 3
+
+def test_rate_limiter_cancelled_waiter_returns_reservation():
+    limiter = WeightedRateLimiter(capacity=20, refill_per_second=20, max_wait=5)
+
+    async def run():
+        await limiter.acquire(20)
+        waiter = asyncio.create_task(limiter.acquire(20))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return limiter.available
+
+    assert asyncio.run(run()) >= 0
+
+def test_rate_limiter_sheds_before_reaching_the_api():
+    limiter = WeightedRateLimiter(capacity=4, refill_per_second=4, max_wait=0.6)
+
+    async def run():
+        async with mock_api(client={'rate_limiter': limiter}) as (server, client):
+            results = await asyncio.gather(*(client._post_info({'type': 'l2Book', 'coin': f'C{i}'})
+                                             for i in range(6)), return_exceptions=True)
+            return server, client, results
+
+    server, client, results = asyncio.run(run())
+    # l2Book weighs 2: two fit the bucket, one more within max_wait
+    assert sum(isinstance(result, RateLimitExceeded) for result in results) == 3
+    assert limiter.shed_count == 3
+    assert server.request_count == 3
+    assert client.failed_request_count == 3
+
+def test_metrics_export_includes_rate_limit_and_circuit_state():
+    client = HyperliquidClient(rate_limiter=WeightedRateLimiter(capacity=100, refill_per_second=10))
+    client.rate_limiter.charge(30)
+    client.circuit_breaker.record_failure()
+    text = client.metrics.to_prometheus()
+    assert 'hyperliquid_rate_limit_available_weight 70' in text
+    assert 'hyperliquid_circuit_breaker_state{state="closed"} 1' in text
+    assert 'hyperliquid_circuit_breaker_state{state="open"} 0' in text
+    assert text.count('# TYPE hyperliquid_circuit_breaker_state gauge') == 1
+
+def test_latency_histogram_buckets_bound_each_value():
+    histogram = LatencyHistogram(sub_bucket_bits=5)
+    # Small values get a bucket each
+    assert [histogram._bucket_index(micros) for micros in (0, 1, 63)] == [0, 1, 63]
+    previous = -1
+    for micros in list(range(0, 5000)) + [2 ** 20 + 12345, 2 ** 30, histogram.max_value]:
+        index = histogram._bucket_index(micros)
+        assert index >= previous
+        previous = index
+        upper = histogram._bucket_value(index)
+        assert micros <= upper <= micros * (1 + 1 / 32) + 1
+    assert histogram._bucket_index(histogram.max_value) == len(histogram.counts) - 1
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram()
+    assert histogram.quantiles((0.5,)) == {0.5: 0.0}
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+    quantiles = histogram.quantiles((0.5, 0.99, 1.0))
+    assert 0.5 <= quantiles[0.5] <= 0.5 * 1.04
+    assert 0.99 <= quantiles[0.99] <= 0.99 * 1.04
+    # The top bucket's bound is capped at the largest value seen
+    assert quantiles[1.0] == histogram.max_seconds == 1.0
+    assert histogram.mean() == pytest.approx(0.5005)
+    histogram.record(-1)
+    histogram.record(10 ** 9)
+    assert histogram.counts[0] == 1 and histogram.counts[-1] == 1
+
+def test_identical_requests_are_coalesced():
+    async def run():
+        async with mock_api(latency=0.1) as (server, client):
+            results = await asyncio.gather(*(client.get_all_mids() for _ in range(10)))
+            return server, client, results
+
+    server, client, results = asyncio.run(run())
+    assert server.request_count == 1
+    assert client.upstream_request_count == 1
+    assert client.coalesced_count == 9
+    assert all(result == results[0] for result in results) and results[0]['SOL'] > 0
+
+def test_server_errors_are_retried_then_open_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    async def run():
+        async with mock_api(error_rate=1.0, client={'max_retries': 2, 'retry_base_delay': 0.01,
+                                                    'circuit_breaker': breaker}) as (server, client):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client._post_info({'type': 'allMids'})
+            assert server.request_count == 3
+            assert client.retry_count == 2
+            assert breaker.state == OPEN
+
+            # While open, requests fail fast without reaching the server
+            with pytest.raises(CircuitOpenError):
+                await client._post_info({'type': 'meta'})
+            assert server.request_count == 3
+            assert await client.get_all_mids() is None
+            assert client.failed_request_count == 3
+
+    asyncio.run(run())
+
+def test_half_open_circuit_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+
+    async def run():
+        async with mock_api(latency=0.2, client={'max_retries': 0, 'circuit_breaker': breaker}) as (server, client):
+            breaker.record_failure()
+            await asyncio.sleep(0.1)
+            results = await asyncio.gather(*(client._post_info({'type': 'l2Book', 'coin': coin})
+                                             for coin in ('BTC', 'ETH', 'SOL')), return_exceptions=True)
+            return server, results
+
+    server, results = asyncio.run(run())
+    assert server.request_count == 1
+    assert sum(isinstance(result, CircuitOpenError) for result in results) == 2
+    assert breaker.get_status()['state'] == 'closed'
+
+def test_streamed_all_mids_decode_to_floats():
+    message = b'{"channel":"allMids","data":{"mids":{"SOL":"41.25","BTC":"65000.5"}}}'
+    expected = ('allMids', {'SOL': 41.25, 'BTC': 65000.5})
+    assert decode_ws_message(message) == expected
+    assert ws_channel_data(loads(message)) == expected
+    assert decode_ws_message(b'{"channel":"pong"}') == ('pong', None)
+    assert decode_ws_message(b'{"channel":"l2Book","data":{"coin":"SOL"}}') == ('l2Book', {'coin': 'SOL'})
+
+def l2_book():
+    return L2Snapshot.from_levels({
+        'coin': 'SOL', 'time': 1_700_000_000_000,
+        'levels': [[{'px': '100', 'sz': '1'}, {'px': '99', 'sz': '2'}, {'px': '98', 'sz': '3'}],
+                   [{'px': '101', 'sz': '1.5'}, {'px': '102', 'sz': '2.5'}]]
+    })
+
+def test_l2_snapshot_depth_on_both_sides():
+    book = l2_book()
+    assert (book.best_bid, book.best_ask, book.mid, book.spread) == (100.0, 101.0, 100.5, 1.0)
+    # Bids are stored best (highest) first: depth counts levels at or above the price
+    assert [book.cumulative_depth(BID, price) for price in (100.5, 100, 99.5, 99, 97)] == [0, 1, 1, 3, 6]
+    assert [book.cumulative_depth(ASK, price) for price in (100, 101, 101.5, 103)] == [0, 1.5, 1.5, 4]
+    assert book.depth_within_bps(100) == (1.0, 1.5)
+    assert book.imbalance(100) == pytest.approx(-0.2)
+
+def test_l2_snapshot_fill_prices_and_slippage():
+    book = l2_book()
+    assert book.price_for_size(BID, 3) == 99.0
+    assert book.price_for_size(BID, 3.5) == 98.0
+    assert book.price_for_size(ASK, 5) is None
+    # Selling 2 fills 1 @ 100 and 1 @ 99
+    assert book.slippage_bps(BID, 2) == pytest.approx(1.0 / 100.5 * 10_000)
+    assert book.slippage_bps(ASK, 1) == pytest.approx(0.5 / 100.5 * 10_000)
+    assert book.slippage_bps(BID, 7) is None
+    assert book.slippage_bps(BID, 0) is None
+
+class FakePriceSources:
+    """Stands in for the stream and client tiers of a PriceResolver"""
+
+    def __init__(self):
+        self.latest_mids = {}
+        self.last_mids_time = 0.0
+        self.all_mids = None
+        self.book = None
+        self.requests = []
+
+    async def get_all_mids(self):
+        self.requests.append('allMids')
+        return self.all_mids
+
+    async def get_l2_snapshot(self, coin):
+        self.requests.append('l2Book')
+        return self.book
+
+def test_price_resolver_falls_back_through_tiers():
+    sources = FakePriceSources()
+    resolver = PriceResolver(sources, sources, stream_max_age=10, mids_max_age=5, fallback_max_age=60)
+
+    async def resolve():
+        return await resolver.resolve('SOL')
+
+    sources.latest_mids, sources.last_mids_time = {'SOL': 41.0}, time.time()
+    assert asyncio.run(resolve())[1:3] == (41.0, SOURCE_STREAM)
+    assert sources.requests == []
+
+    # The stream goes stale: one allMids request, then served from its cache
+    sources.last_mids_time -= 11
+    sources.all_mids = {'SOL': 42.0}
+    assert asyncio.run(resolve())[1:3] == (42.0, SOURCE_ALL_MIDS)
+    assert asyncio.run(resolve())[1:3] == (42.0, SOURCE_ALL_MIDS)
+    assert sources.requests == ['allMids']
+
+    # allMids fails once its cache expires: the l2Book mid is used
+    resolver._mids_time -= 6
+    sources.all_mids = None
+    sources.book = l2_book()
+    resolved = asyncio.run(resolve())
+    assert resolved[1:3] == (100.5, SOURCE_L2_BOOK) and resolved.book is sources.book
+    assert sources.requests == ['allMids', 'allMids', 'l2Book']
+    assert resolver.get_status()['sources'] == {SOURCE_STREAM: 1, SOURCE_ALL_MIDS: 2, SOURCE_L2_BOOK: 1}
+
+def test_price_resolver_returns_the_last_price_marked_stale():
+    sources = FakePriceSources()
+    resolver = PriceResolver(sources, None, fallback_max_age=60)
+    sources.all_mids = {'SOL': 42.0}
+    assert not asyncio.run(resolver.resolve('SOL')).stale
+
+    # Every tier fails: the last price comes back marked stale while it is young enough
+    resolver._mids_time -= 3600
+    sources.all_mids = None
+    stale = asyncio.run(resolver.resolve('SOL'))
+    assert stale.stale and stale.price == 42.0 and stale.source == SOURCE_ALL_MIDS
+    assert resolver.stale_count == 1
+
+    resolver._last_resolved['SOL'] = stale._replace(observed_at=time.time() - 61)
+    assert asyncio.run(resolver.resolve('SOL')) is None
+    assert resolver.failure_count == 1
+    assert asyncio.run(resolver.resolve('BTC')) is None
+
+def test_tick_ring_reads_new_ticks_once():
+    ring = TickRing.create(['SOL', 'BTC'], capacity=8)
+    try:
+        assert len(ring.read_new()) == 0
+        ring.write_mids({'SOL': 41.0, 'BTC': 65000.0, 'ETH': 3000.0}, timestamp=1.0)
+        ticks = ring.read_new()
+        assert ticks['seq'].tolist() == [0, 1]
+        assert [ring.coins[coin] for coin in ticks['coin']] == ['SOL', 'BTC']
+        assert ticks['price'].tolist() == [41.0, 65000.0] and ticks['time'].tolist() == [1.0, 1.0]
+        assert len(ring.read_new()) == 0
+    finally:
+        ring.close()
+
+def test_tick_ring_wraps_around():
+    ring = TickRing.create(['SOL'], capacity=4)
+    try:
+        for i in range(3):
+            ring.write_mids({'SOL': float(i)})
+        assert ring.read_new()['price'].tolist() == [0.0, 1.0, 2.0]
+        # The next three ticks straddle the end of the buffer
+        for i in range(3, 6):
+            ring.write_mids({'SOL': float(i)})
+        ticks = ring.read_new()
+        assert ticks['seq'].tolist() == [3, 4, 5] and ticks['price'].tolist() == [3.0, 4.0, 5.0]
+        assert ring.overrun_count == 0
+    finally:
+        ring.close()
+
+def test_tick_ring_counts_ticks_lost_to_a_lapping_writer():
+    ring = TickRing.create(['SOL'], capacity=4)
+    try:
+        for i in range(10):
+            ring.write_mids({'SOL': float(i)})
+        ticks = ring.read_new()
+        assert ticks['seq'].tolist() == [6, 7, 8, 9]
+        assert ring.overrun_count == 6
+    finally:
+        ring.close()
+
+def test_tick_ring_drops_records_claimed_during_a_read():
+    ring = TickRing.create(['SOL'], capacity=4)
+    try:
+        for i in range(3):
+            ring.write_mids({'SOL': float(i)})
+        # A writer that has claimed seqs 3-5 and is mid-way through overwriting
+        # slots 0-1: their seq fields still look valid, their prices are torn
+        ring.header[_CLAIM_SEQ] = 6
+        ring.records['price'][:2] = -1.0
+        ticks = ring.read_new()
+        assert ticks['seq'].tolist() == [2] and ticks['price'].tolist() == [2.0]
+        assert ring.overrun_count == 2
+    finally:
+        ring.close()
+
+def write_ticks_to_ring(name: str, count: int):
+    ring = TickRing.attach(name)
+    for i in range(count):
+        ring.write_mids({'SOL': 40.0 + i, 'BTC': 60000.0 + i}, timestamp=float(i))
+    ring.close()
+
+def test_tick_ring_attach_and_close_across_processes():
+    ring = TickRing.create(['SOL', 'BTC'], capacity=64)
+    try:
+        process = multiprocessing.get_context('spawn').Process(target=write_ticks_to_ring, args=(ring.name, 20))
+        process.start()
+        process.join(timeout=30)
+        assert process.exitcode == 0
+        ticks = ring.read_new()
+        assert ticks['seq'].tolist() == list(range(40))
+        assert ticks['price'][ticks['coin'] == ring.coin_ids['SOL']].tolist() == [40.0 + i for i in range(20)]
+        # The writer's close() left the ring mapped for its creator
+        assert ring.get_status()['write_seq'] == 40
+    finally:
+        ring.close()
+    with pytest.raises(FileNotFoundError):
+        TickRing.attach(ring.name)
+
+def test_mock_server_streams_all_mids():
+    received = []
+
+    async def run():
+        async with mock_api(ws_push_interval=0.05) as (server, client):
+            stream = HyperliquidStream(ws_url=server.ws_url, loop=asyncio.get_running_loop())
+            stream.subscribe_all_mids(received.append)
+            stream.start()
+            try:
+                await wait_for(lambda: len(received) >= 3)
+                return await client.get_all_mids()
+            finally:
+                stream.stop()
+
+    mids = asyncio.run(run())
+    assert set(received[-1]) == set(mids)
+    assert all(isinstance(price, float) and price > 0 for price in received[-1].values())
+
+def test_supervisor_backfills_a_stream_gap():
+    live = []
+    backfilled = []
+
+    async def run():
+        async with mock_api(ws_push_interval=0.05) as (server, client):
+            stream = HyperliquidStream(ws_url=server.ws_url, loop=asyncio.get_running_loop(), reconnect_delay=0.1)
+            supervisor = StreamSupervisor(stream, client, ['SOL'], live.append, min_gap=1,
+                                          on_backfill=lambda mids, timestamp: backfilled.append((timestamp, mids)))
+            supervisor.start()
+            stream.start()
+            try:
+                await wait_for(lambda: live)
+                server.drop_ws_connections()
+                await wait_for(lambda: not stream.is_connected)
+                # Pretend the outage lasted ten minutes
+                gap_start = time.time() - 600
+                supervisor.last_tick_time = gap_start
+                live.clear()
+                await wait_for(lambda: live)
+                return gap_start, supervisor.get_status()
+            finally:
+                supervisor.stop()
+                stream.stop()
+
+    gap_start, status = asyncio.run(run())
+    assert status['gap_count'] == 1
+    assert status['backfilled_points'] == len(backfilled) >= 9
+    times = [timestamp for timestamp, _ in backfilled]
+    assert times == sorted(times) and gap_start < times[0] and times[-1] < time.time()
+    assert all(mids['SOL'] > 0 for _, mids in backfilled)
+    # Stamped at each 1m candle's close time
+    assert all(round(timestamp * 1000) % 60_000 == 59_999 for timestamp in times)
+
+def test_backfilled_closes_never_alert(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from config import TRACKED_ASSET
+    from telegram_bot import HypeBot
+
+    bot = HypeBot()
+    alerts = []
+
+    async def send_alert(context, analysis):
+        alerts.append(analysis)
+
+    async def run():
+        bot.monitor_context = object()
+        bot.send_alert = send_alert
+        monkeypatch.setattr(bot.price_analyzer, 'should_alert', lambda: (True, {'reason': 'test'}))
+        bot.stream_supervisor.on_backfill({TRACKED_ASSET: 40.0}, time.time() - 120)
+        await asyncio.sleep(0)
+        assert alerts == []
+        bot._on_stream_mids({TRACKED_ASSET: 40.0})
+        await bot._stream_alert_task
+
+    try:
+        asyncio.run(run())
+    finally:
+        bot.tick_store.close()
+        bot.state_db.close()
+    assert len(alerts) == 1
+    text = bot.hyperliquid_client.metrics.to_prometheus()
+    assert 'hyperliquid_stream_gaps_total 0' in text
+    assert 'hyperliquid_stream_connected 0' in text
+
+def test_tick_store_restores_analyzer_bars(tmp_path, monkeypatch):
+    """Stored ticks come back as HISTORY_INTERVAL bar closes, in time order"""
+    monkeypatch.chdir(tmp_path)
+    from config import HISTORY_INTERVAL, TICK_STORE_DIR, TRACKED_ASSET
+    from candle_aggregator import BAR_INTERVAL_MS
+    from telegram_bot import HypeBot
+
+    now = time.time()
+    interval_ms = BAR_INTERVAL_MS[HISTORY_INTERVAL]
+    times = np.arange(int((now - 5 * 3600) * 1000), int(now * 1000) - 1000, 10_000)
+    prices = 100 + np.arange(len(times)) * 0.001
+    store = TickStore(TICK_STORE_DIR)
+    store.append_many(TRACKED_ASSET, times, prices, 'stream')
+    store.close()
+
+    store = TickStore(TICK_STORE_DIR)
+    assert len(store.read_range(TRACKED_ASSET, start=now - 3600)) == pytest.approx(360, abs=1)
+    store.close()
+
+    bot = HypeBot()
+    try:
+        restored, oldest = bot._restore_history()
+    finally:
+        bot.tick_store.close()
+        bot.state_db.close()
+    history = bot.price_analyzer.price_history
+    assert restored == len(history) >= 9
+    assert history == sorted(history)
+    assert oldest * 1000 % interval_ms == 0
+    if times[-1] // interval_ms == int(time.time() * 1000) // interval_ms:
+        # The last stored bar is still open and carries the current price
+        assert bot.price_analyzer.current_price == prices[-1]
+
+def test_startup_fills_stored_history_up_to_now(tmp_path, monkeypatch):
+    """Downtime since the last stored tick is filled from candles before bars are restored"""
+    monkeypatch.chdir(tmp_path)
+    from config import HISTORY_INTERVAL, TICK_STORE_DIR, TRACKED_ASSET
+    from candle_aggregator import BAR_INTERVAL_MS
+    from telegram_bot import HypeBot
+
+    now = time.time()
+    interval_ms = BAR_INTERVAL_MS[HISTORY_INTERVAL]
+    # Stored ticks stop five hours ago
+    times = np.arange(int((now - 8 * 3600) * 1000), int((now - 5 * 3600) * 1000), 10_000)
+    store = TickStore(TICK_STORE_DIR)
+    store.append_many(TRACKED_ASSET, times, np.full(len(times), 100.0), 'stream')
+    store.close()
+
+    async def run():
+        async with mock_api() as (server, client):
+            bot = HypeBot()
+            bot.hyperliquid_client = client
+            try:
+                await bot._fill_stored_history()
+                return bot, bot._restore_history(), bot.tick_store.read_range(TRACKED_ASSET)
+            finally:
+                bot.tick_store.close()
+                bot.state_db.close()
+
+    bot, (restored, oldest), ticks = asyncio.run(run())
+    first_bar, current_bar = times[0] // interval_ms, int(time.time() * 1000) // interval_ms
+    # Every bar from the first stored one up to the open one has a close
+    assert restored == current_bar - first_bar
+    assert oldest * 1000 == first_bar * interval_ms
+    filled = ticks[ticks['time'] > times[-1]]
+    assert len(filled) == restored - (times[-1] // interval_ms - first_bar)
+    assert np.all(filled['time'] % interval_ms == interval_ms - 1)
+    assert bot.price_analyzer.price_history[-1] != 100.0
+
+def test_state_store_round_trip(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path, commit_interval=0.01)
+    store.set_state('last_alert_time', '2024-05-01T12:00:00')
+    store.set_chat_setting(123, 'regular_updates', False)
+    for _ in range(50):
+        store.record_alert('SOL', 41.2, 'current_price_below_target', True, True, False, '123')
+    store.close()
+    assert store.error_count == 0
+    assert store.commit_count < 52
+
+    store = StateStore(path)
+    try:
+        state = store.restore()
+        alerts = store.recent_alerts(5)
+    finally:
+        store.close()
+    assert state == {'state': {'last_alert_time': '2024-05-01T12:00:00'},
+                     'chat_settings': {'123': {'regular_updates': False}}}
+    assert len(alerts) == 5 and alerts[0]['urgent'] == 1 and alerts[0]['text_sent'] == 0
+
+def test_bot_restores_alert_cooldown_and_chat_settings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from config import STATE_DB_PATH
+    from telegram_bot import HypeBot
+
+    store = StateStore(STATE_DB_PATH)
+    store.set_state('last_alert_time', '2024-05-01T12:00:00')
+    store.set_chat_setting('123', 'regular_updates', False)
+    store.close()
+
+    bot = HypeBot()
+    try:
+        bot._restore_state()
+    finally:
+        bot.tick_store.close()
+        bot.state_db.close()
+    assert bot.telegram_alerter.last_alert_time.isoformat() == '2024-05-01T12:00:00'
+    assert bot._chat_setting('123', 'regular_updates', True) is False
+    assert bot._chat_setting('456', 'regular_updates', True) is True
+
+def test_bar_series_builds_ohlc_and_ignores_late_ticks():
+    series = BarSeries(interval_ms=1000, capacity=4)
+    for price, timestamp in ((10.0, 1200), (12.0, 1500), (9.0, 1999)):
+        assert series.update(price, timestamp) == []
+    closed = series.update(11.0, 2000)
+    assert closed == [{'time': 1000, 'open': 10.0, 'high': 12.0, 'low': 9.0, 'close': 9.0,
+                       'volume': 0.0, 'trades': 3}]
+    assert series.update(5.0, 1999) == []
+    assert series.late_count == 1
+    assert series.current_bar()['close'] == 11.0
+
+def test_bar_series_fast_forwards_empty_bars_past_capacity():
+    series = BarSeries(interval_ms=1000, capacity=4)
+    series.update(10.0, 1000)
+    series.update(11.0, 2000)
+    assert series.advance(2999) == []
+    # 98 intervals later: the open bar closes, then only the last ``capacity`` empty ones
+    closed = series.advance(100_000)
+    assert [bar['time'] for bar in closed] == [2000, 96_000, 97_000, 98_000, 99_000]
+    assert all(bar['close'] == bar['open'] == 11.0 and bar['trades'] == 0 for bar in closed[1:])
+    assert series.current_bar()['time'] == 100_000
+
+    # Six bars closed into four slots: get_bars reads the ring oldest first
+    assert series.closed_count == 6
+    assert series.get_bars()['time'].tolist() == [96_000, 97_000, 98_000, 99_000]
+    assert series.get_bars(2)['time'].tolist() == [98_000, 99_000]
+    assert len(series.get_bars(10)['time']) == 4
+
+def test_candle_aggregator_publishes_bars_per_interval():
+    aggregator = CandleAggregator(coins=['SOL'], intervals=['1s', '1m'])
+    published = []
+    aggregator.subscribe(lambda coin, interval, bar: published.append((interval, bar['time'], bar['close'])),
+                         interval='1m')
+    aggregator.on_tick_batch({'SOL': 40.0, 'BTC': 60000.0}, 60.5)
+    aggregator.on_tick_batch({'SOL': 41.0}, 119.0)
+    aggregator.advance(120.0)
+    assert published == [('1m', 60_000, 41.0)]
+    assert aggregator.get_bars('SOL', '1s')['time'].tolist()[-1] == 119_000
+    assert aggregator.get_bars('BTC', '1m') is None
+    aggregator.on_tick_batch({'SOL': 39.0}, 30.0)
+    assert aggregator.get_status()['late_ticks'] == 2
+
+def test_bar_spanning_a_stream_gap_closes_at_its_backfilled_price(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from config import HISTORY_INTERVAL, TRACKED_ASSET
+    from candle_aggregator import BAR_INTERVAL_MS
+    from telegram_bot import HypeBot
+
+    interval = BAR_INTERVAL_MS[HISTORY_INTERVAL] // 1000
+    # The stream drops five minutes before a bar boundary and comes back after it
+    boundary = time.time() // interval * interval
+    bot = HypeBot()
+    stream, supervisor = bot.price_stream, bot.stream_supervisor
+
+    async def run():
+        stream.last_mids_time = boundary - 300
+        bot._on_live_mids({TRACKED_ASSET: 100.0})
+        supervisor.last_tick_time = boundary - 300
+        stream.is_connected = False
+        assert supervisor.gap_open()
+        bot.candle_aggregator.advance()
+
+        for minute in range(4, -1, -1):
+            supervisor.on_backfill({TRACKED_ASSET: 91.0 + minute}, boundary - minute * 60 - 1)
+        assert bot.price_analyzer.price_history == []
+
+        stream.is_connected = True
+        supervisor.last_tick_time = stream.last_mids_time = time.time()
+        bot._on_live_mids({TRACKED_ASSET: 90.0})
+
+    try:
+        asyncio.run(run())
+    finally:
+        bot.tick_store.close()
+        bot.state_db.close()
+    assert bot.price_analyzer.price_history == [91.0]
+    assert bot.candle_aggregator.get_status()['late_ticks'] == 0
+    assert bot.candle_aggregator.get_bars(TRACKED_ASSET, '1m', 1)['close'][-1] == 91.0
+
+def test_current_price_follows_live_ticks_after_a_backfilled_gap(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from config import HISTORY_INTERVAL, TRACKED_ASSET
+    from candle_aggregator import BAR_INTERVAL_MS
+    from telegram_bot import HypeBot
+
+    interval = BAR_INTERVAL_MS[HISTORY_INTERVAL] // 1000
+    boundary = time.time() // interval * interval
+    bot = HypeBot()
+    bot.price_analyzer.load_history([100.0] * 10)
+    bot.tick_conflator.interval = 0
+    stream, supervisor = bot.price_stream, bot.stream_supervisor
+
+    def live(price):
+        supervisor.last_tick_time = stream.last_mids_time = time.time()
+        bot._on_live_mids({TRACKED_ASSET: price})
+        return bot.price_analyzer.get_analysis_summary()['current_price']
+
+    async def run():
+        assert live(100.0) == 100.0
+        # The gap ends a bar at 95.0, published when the live feed resumes
+        stream.is_connected = False
+        supervisor.last_tick_time = boundary - 300
+        supervisor.on_backfill({TRACKED_ASSET: 95.0}, boundary - 1)
+        stream.is_connected = True
+        # Within the conflation threshold of the last forwarded price: suppressed
+        assert live(100.005) == 100.0
+        assert bot.tick_conflator.suppressed_ticks == 1
+
+        # A polled price moves the conflator's reference with it
+        bot._add_price(95.0, SOURCE_ALL_MIDS)
+        assert bot.price_analyzer.current_price == 95.0
+        assert live(100.005) == 100.005
+
+    try:
+        asyncio.run(run())
+    finally:
+        bot.tick_store.close()
+        bot.state_db.close()
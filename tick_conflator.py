@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, Optional
+import logging
+from config import CONFLATION_INTERVAL_SECONDS, CONFLATION_MIN_CHANGE_BPS
+
+logger = logging.getLogger(__name__)
+
+class TickConflator:
+    """Thins a {coin: price} feed before it reaches the analyzer
+
+    A tick is dropped if it moved less than ``min_change_bps`` from the
+    last price forwarded for that coin (comparing against the forwarded
+    price, so slow drifts still get through). Surviving ticks are held
+    for at most ``interval`` seconds, keeping only the latest per coin, and
+    forwarded together in one ``on_mids`` call. With ``interval`` 0 ticks
+    are forwarded immediately. Must be fed from the asyncio loop.
+    """
+
+    def __init__(self, on_mids: Callable[[Dict[str, float]], None],
+                 coins: Optional[Iterable[str]] = None,
+                 interval: float = CONFLATION_INTERVAL_SECONDS,
+                 min_change_bps: float = CONFLATION_MIN_CHANGE_BPS):
+        self.on_mids = on_mids
+        self.coins = set(coins) if coins is not None else None
+        self.interval = interval
+        self.min_change = min_change_bps / 10_000
+
+        self._last_forwarded: Dict[str, float] = {}
+        self._pending: Dict[str, float] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._last_flush = 0.0
+
+        self.received_ticks = 0
+        self.suppressed_ticks = 0
+        self.conflated_ticks = 0
+        self.forwarded_ticks = 0
+        self.forwarded_batches = 0
+
+    def on_tick_batch(self, mids: Dict[str, float]):
+        """Feed one message's prices"""
+        if self.coins is not None:
+            mids = {coin: price for coin, price in mids.items() if coin in self.coins}
+        self.received_ticks += len(mids)
+        for coin, price in mids.items():
+            last = self._last_forwarded.get(coin)
+            if last is not None and abs(price - last) <= last * self.min_change:
+                self.suppressed_ticks += 1
+                # A newer tick back inside the band cancels a pending move
+                if self._pending.pop(coin, None) is not None:
+                    self.conflated_ticks += 1
+                continue
+            if coin in self._pending:
+                self.conflated_ticks += 1
+            self._pending[coin] = price
+
+        if not self._pending:
+            return
+        wait = self._last_flush + self.interval - time.monotonic()
+        if wait <= 0:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(wait, self.flush)
+
+    def set_reference(self, mids: Dict[str, float]):
+        """Measure later ticks against prices the consumer got another way (e.g. a REST poll)"""
+        if self.coins is not None:
+            mids = {coin: price for coin, price in mids.items() if coin in self.coins}
+        self._last_forwarded.update(mids)
+
+    def flush(self):
+        """Forward pending ticks now"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._last_forwarded.update(batch)
+        self.forwarded_ticks += len(batch)
+        self.forwarded_batches += 1
+        self.on_mids(batch)
+
+    def get_status(self) -> Dict:
+        """Get counts of ticks removed before analysis"""
+        removed = self.suppressed_ticks + self.conflated_ticks
+        return {
+            'received_ticks': self.received_ticks,
+            'suppressed_ticks': self.suppressed_ticks,
+            'conflated_ticks': self.conflated_ticks,
+            'forwarded_ticks': self.forwarded_ticks,
+            'forwarded_batches': self.forwarded_batches,
+            'removed_ratio': removed / self.received_ticks if self.received_ticks else 0.0
+        }
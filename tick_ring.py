@@ -0,0 +1,154 @@
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+import numpy as np
+import logging
+from config import TICK_RING_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+RING_MAGIC = 0x48595045_52494E47  # "HYPERING"
+COIN_NAME_BYTES = 16
+
+# Header slots (int64)
+_MAGIC, _CAPACITY, _COIN_COUNT, _WRITE_SEQ, _CLAIM_SEQ = range(5)
+HEADER_SLOTS = 5
+
+TICK_DTYPE = np.dtype([('seq', np.int64), ('time', np.float64), ('price', np.float64), ('coin', np.int64)])
+
+class TickRing:
+    """Single-writer, multi-reader ring of (time, coin, price) ticks in shared memory
+
+    Layout: an int64 header (magic, capacity, coin count, write sequence,
+    claim sequence), the coin names, then ``capacity`` tick records. The
+    writer first claims the sequence range it is about to overwrite, stamps
+    each record with its sequence number after filling it and then
+    advances the write sequence. Readers copy new records out of the mapped
+    buffer, then drop any that the writer had claimed by the end of the
+    copy, so no lock is shared between processes.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        if self.header[_MAGIC] != RING_MAGIC:
+            raise ValueError(f"Shared memory '{shm.name}' is not a tick ring")
+        self.capacity = int(self.header[_CAPACITY])
+        coin_count = int(self.header[_COIN_COUNT])
+        names_offset = HEADER_SLOTS * 8
+        names = np.ndarray((coin_count,), dtype=f'S{COIN_NAME_BYTES}', buffer=shm.buf, offset=names_offset)
+        self.coins: List[str] = [name.decode() for name in names]
+        self.coin_ids: Dict[str, int] = {coin: i for i, coin in enumerate(self.coins)}
+        self.records = np.ndarray((self.capacity,), dtype=TICK_DTYPE, buffer=shm.buf,
+                                  offset=names_offset + coin_count * COIN_NAME_BYTES)
+        self.read_seq = int(self.header[_WRITE_SEQ])
+        self.overrun_count = 0
+
+    @staticmethod
+    def _size(capacity: int, coin_count: int) -> int:
+        return HEADER_SLOTS * 8 + coin_count * COIN_NAME_BYTES + capacity * TICK_DTYPE.itemsize
+
+    @classmethod
+    def create(cls, coins: List[str], capacity: int = TICK_RING_CAPACITY,
+               name: Optional[str] = None) -> "TickRing":
+        """Allocate a new ring; the creator is responsible for unlink()"""
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls._size(capacity, len(coins)))
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (RING_MAGIC, capacity, len(coins), 0, 0)
+        names = np.ndarray((len(coins),), dtype=f'S{COIN_NAME_BYTES}', buffer=shm.buf, offset=HEADER_SLOTS * 8)
+        names[:] = [coin.encode()[:COIN_NAME_BYTES] for coin in coins]
+        ring = cls(shm, owner=True)
+        ring.records['seq'] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name: str) -> "TickRing":
+        """Map an existing ring created by another process
+
+        Meant for processes spawned by the creator, which share its
+        resource tracker, so only the creator's unlink() releases the ring.
+        """
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def write_seq(self) -> int:
+        return int(self.header[_WRITE_SEQ])
+
+    def write(self, coin_ids: np.ndarray, prices: np.ndarray, timestamp: Optional[float] = None):
+        """Append one tick per coin, all stamped with ``timestamp`` (single writer only)"""
+        count = len(coin_ids)
+        if not count:
+            return
+        start = int(self.header[_WRITE_SEQ])
+        seqs = np.arange(start, start + count, dtype=np.int64)
+        slots = seqs % self.capacity
+        # Readers discard anything older than claim - capacity once they see this
+        self.header[_CLAIM_SEQ] = start + count
+        self.records['seq'][slots] = -1
+        self.records['time'][slots] = timestamp if timestamp is not None else time.time()
+        self.records['price'][slots] = prices
+        self.records['coin'][slots] = coin_ids
+        self.records['seq'][slots] = seqs
+        self.header[_WRITE_SEQ] = start + count
+
+    def write_mids(self, mids: Dict[str, float], timestamp: Optional[float] = None):
+        """Append ticks for the ring's coins from an allMids mapping"""
+        ids = [coin_id for coin, coin_id in self.coin_ids.items() if coin in mids]
+        if ids:
+            self.write(np.array(ids, dtype=np.int64),
+                       np.array([mids[self.coins[i]] for i in ids], dtype=np.float64), timestamp)
+
+    def read_new(self) -> np.ndarray:
+        """Return the ticks written since the last call, oldest first
+
+        If the writer lapped this reader, the oldest unread ticks are lost
+        and counted in ``overrun_count``.
+        """
+        end = int(self.header[_WRITE_SEQ])
+        start = max(self.read_seq, end - self.capacity)
+        if start > self.read_seq:
+            self.overrun_count += start - self.read_seq
+        if end <= start:
+            return self.records[:0].copy()
+
+        first, last = start % self.capacity, (end - 1) % self.capacity
+        if first <= last:
+            ticks = self.records[first:last + 1].copy()
+        else:
+            ticks = np.concatenate((self.records[first:], self.records[:last + 1]))
+        # A record copied while the writer lapped us can carry its old seq with
+        # new fields, so also drop every slot the writer had claimed by now
+        claimed = int(self.header[_CLAIM_SEQ])
+        seqs = np.arange(start, end, dtype=np.int64)
+        valid = (ticks['seq'] == seqs) & (seqs >= claimed - self.capacity)
+        if not valid.all():
+            self.overrun_count += int((~valid).sum())
+            ticks = ticks[valid]
+        self.read_seq = end
+        return ticks
+
+    def close(self):
+        """Unmap the ring (and unlink it if this process created it)"""
+        # Drop our views before closing, or the mmap can't be released
+        self.header = self.records = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_status(self) -> Dict:
+        return {
+            'name': self.name,
+            'capacity': self.capacity,
+            'coins': len(self.coins),
+            'write_seq': self.write_seq,
+            'read_seq': self.read_seq,
+            'overruns': self.overrun_count
+        }
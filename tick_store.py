@@ -0,0 +1,142 @@
+import bisect
+import os
+import time
+from typing import Dict, Optional
+import numpy as np
+import logging
+from config import TICK_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Fixed 24-byte little-endian records: epoch ms, price, source code
+TICK_RECORD_DTYPE = np.dtype([('time', '<i8'), ('price', '<f8'), ('source', 'u1'), ('_pad', 'V7')])
+
+SOURCE_CODES = {
+    'stream': 1,
+    'allMids': 2,
+    'l2Book': 3,
+    'candle': 4
+}
+SOURCE_NAMES = {code: name for name, code in SOURCE_CODES.items()}
+
+class CoinTickLog:
+    """Append-only tick file for one coin, read through a memory map
+
+    Records must arrive in non-decreasing time order (older ones are
+    dropped), which keeps the file sorted so range queries are a binary
+    search over the mapped timestamps. A torn record left by a crash is
+    truncated when the file is reopened.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size % TICK_RECORD_DTYPE.itemsize:
+            logger.warning(f"Truncating partial record at the end of {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(size - size % TICK_RECORD_DTYPE.itemsize)
+        self._file = open(path, 'ab')
+        self._map: Optional[np.memmap] = None
+        self._mapped_count = 0
+        self.dropped_count = 0
+        records = self.records()
+        self.last_time = int(records['time'][-1]) if len(records) else 0
+
+    def append(self, times_ms: np.ndarray, prices: np.ndarray, source: int):
+        """Buffer records for writing; flush() makes them visible to readers"""
+        keep = times_ms >= np.maximum.accumulate(np.maximum(times_ms, self.last_time))
+        if not keep.all():
+            self.dropped_count += int((~keep).sum())
+            times_ms, prices = times_ms[keep], prices[keep]
+        if not len(times_ms):
+            return
+        batch = np.zeros(len(times_ms), dtype=TICK_RECORD_DTYPE)
+        batch['time'] = times_ms
+        batch['price'] = prices
+        batch['source'] = source
+        self._file.write(batch.tobytes())
+        self.last_time = int(times_ms[-1])
+
+    def flush(self):
+        self._file.flush()
+
+    def records(self) -> np.ndarray:
+        """All flushed records as a read-only memory-mapped array"""
+        count = os.path.getsize(self.path) // TICK_RECORD_DTYPE.itemsize
+        if count != self._mapped_count:
+            # The file grew; map it again to cover the new records
+            self._map = np.memmap(self.path, dtype=TICK_RECORD_DTYPE, mode='r', shape=(count,)) if count else None
+            self._mapped_count = count
+        return self._map if self._map is not None else np.zeros(0, dtype=TICK_RECORD_DTYPE)
+
+    def read_range(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+        """Records with start_ms <= time < end_ms, as a zero-copy slice of the map"""
+        records = self.records()
+        # bisect reads O(log n) timestamps; np.searchsorted would copy the strided field first
+        times = records['time']
+        first = bisect.bisect_left(times, start_ms) if start_ms is not None else 0
+        last = bisect.bisect_left(times, end_ms) if end_ms is not None else len(records)
+        return records[first:last]
+
+    def close(self):
+        self._file.close()
+        self._map = None
+
+class TickStore:
+    """Directory of per-coin CoinTickLogs ({coin}.ticks)
+
+    Used to persist the prices fed to PriceAnalyzer so a restart can
+    restore its history without calling the API, and to answer history
+    queries locally.
+    """
+
+    def __init__(self, directory: str = TICK_STORE_DIR):
+        self.directory = directory
+        self._logs: Dict[str, CoinTickLog] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _log(self, coin: str) -> CoinTickLog:
+        log = self._logs.get(coin)
+        if log is None:
+            log = self._logs[coin] = CoinTickLog(os.path.join(self.directory, f"{coin}.ticks"))
+        return log
+
+    def append(self, coin: str, price: float, timestamp: Optional[float] = None, source: str = 'stream'):
+        """Record one price observed at ``timestamp`` (epoch seconds, default now)"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        self._log(coin).append(np.array([int(timestamp * 1000)], dtype=np.int64),
+                               np.array([price], dtype=np.float64), SOURCE_CODES[source])
+
+    def append_many(self, coin: str, times_ms: np.ndarray, prices: np.ndarray, source: str):
+        """Record a batch of prices with epoch-ms timestamps, oldest first"""
+        self._log(coin).append(np.asarray(times_ms, dtype=np.int64),
+                               np.asarray(prices, dtype=np.float64), SOURCE_CODES[source])
+
+    def flush(self):
+        for log in self._logs.values():
+            log.flush()
+
+    def read_range(self, coin: str, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """Ticks with start <= time < end (epoch seconds), oldest first"""
+        log = self._log(coin)
+        log.flush()
+        return log.read_range(int(start * 1000) if start is not None else None,
+                              int(end * 1000) if end is not None else None)
+
+    def last(self, coin: str, count: int) -> np.ndarray:
+        """The ``count`` most recent ticks for a coin, oldest first"""
+        log = self._log(coin)
+        log.flush()
+        records = log.records()
+        return records[max(len(records) - count, 0):]
+
+    def close(self):
+        for log in self._logs.values():
+            log.close()
+        self._logs.clear()
+
+    def get_status(self) -> Dict:
+        return {
+            coin: {'records': len(log.records()), 'last_time_ms': log.last_time, 'dropped': log.dropped_count}
+            for coin, log in self._logs.items()
+        }
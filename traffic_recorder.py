@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Record-and-replay of Hyperliquid traffic
+
+TrafficRecorder appends every REST response and WebSocket message, with its
+receive timestamp, to gzip-compressed JSONL segments. ReplayClient and
+ReplayStream feed those segments back through the HyperliquidClient and
+HyperliquidStream interfaces, so recorded sessions can be re-run offline.
+"""
+
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Deque, Dict, Iterator, List, Optional, Union
+import httpx
+import logging
+from config import RECORDING_DIR, RECORDING_SEGMENT_MAX_RECORDS
+from json_codec import loads, dumps
+from hyperliquid_client import HyperliquidClient
+from hyperliquid_stream import HyperliquidStream
+
+logger = logging.getLogger(__name__)
+
+class TrafficRecorder:
+    """Appends API traffic to rotating gzip JSONL segment files
+
+    Each line is {"ts": receive time, "kind": "info" | "ws", ...}. Raw
+    response bodies and WebSocket frames are embedded verbatim, so
+    recording costs no re-encoding. Failed /info requests are kept too:
+    error responses with their status and body, and transport errors
+    with the exception type. Safe to call from the event loop and
+    the WebSocket thread at the same time.
+    """
+
+    def __init__(self, directory: str = RECORDING_DIR,
+                 segment_max_records: int = RECORDING_SEGMENT_MAX_RECORDS):
+        self.directory = directory
+        self.segment_max_records = segment_max_records
+        self._lock = threading.Lock()
+        self._file: Optional[gzip.GzipFile] = None
+        self._segment_records = 0
+        self._segment_index = 0
+        self.record_count = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.close()
+        self._segment_index += 1
+        stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.directory, f"traffic-{stamp}-{self._segment_index:04d}.jsonl.gz")
+        self._file = gzip.open(path, 'ab')
+        self._segment_records = 0
+        logger.info(f"Recording traffic to {path}")
+
+    def _write(self, line: bytes):
+        with self._lock:
+            if self._file is None or self._segment_records >= self.segment_max_records:
+                self._open_segment()
+            self._file.write(line)
+            self._segment_records += 1
+            self.record_count += 1
+
+    def record_info(self, payload: Dict, body: bytes, status: int = 200, retry_after: Optional[str] = None):
+        """Record an /info request and its raw response body"""
+        if status == 200:
+            self._write(b'{"ts":%.6f,"kind":"info","request":%s,"response":%s}\n'
+                        % (time.time(), dumps(payload), body))
+            return
+        # Error bodies aren't necessarily JSON, so store them as text
+        self._write(b'{"ts":%.6f,"kind":"info","request":%s,"status":%d,"body":%s,"retry_after":%s}\n'
+                    % (time.time(), dumps(payload), status,
+                       dumps(body.decode('utf-8', 'replace')), dumps(retry_after)))
+
+    def record_error(self, payload: Dict, error: Exception):
+        """Record an /info request that failed without a response"""
+        self._write(b'{"ts":%.6f,"kind":"info","request":%s,"error":%s,"message":%s}\n'
+                    % (time.time(), dumps(payload), dumps(type(error).__name__), dumps(str(error))))
+
+    def record_ws(self, message: Union[str, bytes]):
+        """Record a raw WebSocket text frame"""
+        if isinstance(message, str):
+            message = message.encode()
+        self._write(b'{"ts":%.6f,"kind":"ws","message":%s}\n' % (time.time(), message))
+
+    def close(self):
+        """Flush and close the current segment"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def read_recording(paths: Union[str, List[str]]) -> Iterator[Dict]:
+    """Yield recorded records from segment files (or a directory) in order"""
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(os.path.join(paths, '*.jsonl.gz'))) if os.path.isdir(paths) else [paths]
+    for path in paths:
+        with gzip.open(path, 'rb') as segment:
+            for line in segment:
+                if line.strip():
+                    yield loads(line)
+
+def _request_keys(payload: Dict) -> List[str]:
+    """Exact and time-insensitive lookup keys for a recorded request
+
+    candleSnapshot ranges depend on the wall clock at request time, so a
+    replayed request falls back to any recording for the same coin and
+    interval.
+    """
+    keys = [json.dumps(payload, sort_keys=True, separators=(',', ':'))]
+    if isinstance(payload.get('req'), dict):
+        req = {k: v for k, v in payload['req'].items() if k not in ('startTime', 'endTime')}
+        keys.append(json.dumps(dict(payload, req=req), sort_keys=True, separators=(',', ':')))
+    return keys
+
+def _replay_record(record: Dict, base_url: str):
+    """Return a recorded response, or raise the recorded failure"""
+    if 'response' in record:
+        return record['response']
+    request = httpx.Request("POST", f"{base_url}/info")
+    if 'status' in record:
+        headers = {'Retry-After': record['retry_after']} if record.get('retry_after') else {}
+        response = httpx.Response(record['status'], content=record['body'].encode(),
+                                  headers=headers, request=request)
+        raise httpx.HTTPStatusError(f"Recorded HTTP {record['status']} response",
+                                    request=request, response=response)
+    error_type = getattr(httpx, record['error'], None)
+    if not (isinstance(error_type, type) and issubclass(error_type, httpx.TransportError)):
+        error_type = httpx.TransportError
+    raise error_type(record['message'], request=request)
+
+class ReplayClient(HyperliquidClient):
+    """HyperliquidClient that answers /info requests from a recording
+
+    Responses for identical requests are returned in recorded order; once
+    they run out the last one is repeated. Recorded failures are raised
+    again as the matching httpx.HTTPStatusError or TransportError, so
+    everything above the transport (retries, circuit breaker, caching,
+    coalescing, parsing) behaves exactly as with the live API.
+    """
+
+    def __init__(self, paths: Union[str, List[str]], **kwargs):
+        super().__init__(**kwargs)
+        self._responses: Dict[str, Deque] = defaultdict(deque)
+        self._last_response: Dict[str, object] = {}
+        for record in read_recording(paths):
+            if record['kind'] == 'info':
+                for key in _request_keys(record['request']):
+                    self._responses[key].append(record)
+
+    async def _send_info_once(self, payload: Dict, timeout: Optional[float] = None):
+        self.upstream_request_count += 1
+        for key in _request_keys(payload):
+            queue = self._responses.get(key)
+            if queue:
+                self._last_response[key] = queue.popleft()
+            if key in self._last_response:
+                return _replay_record(self._last_response[key], self.base_url)
+        raise LookupError(f"No recorded response for {payload}")
+
+class ReplayStream(HyperliquidStream):
+    """HyperliquidStream that plays recorded WebSocket messages back
+
+    ``speed`` scales the recorded inter-message gaps: 1.0 is real time,
+    10.0 is ten times faster and 0 replays as fast as possible.
+    """
+
+    def __init__(self, paths: Union[str, List[str]], speed: float = 1.0,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        super().__init__(ws_url="replay", loop=loop)
+        self.paths = paths
+        self.speed = speed
+        self.finished = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._replay, name="hyperliquid-replay", daemon=True)
+        self._thread.start()
+        logger.info(f"Replaying recorded stream at {'max' if not self.speed else f'{self.speed}x'} speed")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def reconnect(self):
+        pass
+
+    def _send(self, message: Dict):
+        pass
+
+    def _replay(self):
+        self.is_connected = True
+        self.connect_count += 1
+        first_recorded = None
+        started = time.monotonic()
+        for record in read_recording(self.paths):
+            if self._stop_event.is_set():
+                break
+            if record['kind'] != 'ws':
+                continue
+            if self.speed:
+                if first_recorded is None:
+                    first_recorded = record['ts']
+                delay = (record['ts'] - first_recorded) / self.speed - (time.monotonic() - started)
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+            self.last_message_time = time.time()
+            self.message_count += 1
+            self._handle_message(record['message'])
+        self.is_connected = False
+        self.finished.set()
+
+async def measure_replay(paths: Union[str, List[str]], coin: str, speed: float) -> Dict:
+    """Replay a recording into PriceAnalyzer and measure tick/alert throughput"""
+    from price_analyzer import PriceAnalyzer
+
+    analyzer = PriceAnalyzer()
+    stream = ReplayStream(paths, speed=speed, loop=asyncio.get_running_loop())
+    ticks = 0
+    alerts = 0
+
+    def on_mids(mids: Dict[str, float]):
+        nonlocal ticks, alerts
+        price = mids.get(coin)
+        if price is None:
+            return
+        ticks += 1
+        analyzer.add_price(price)
+        if analyzer.should_alert()[0]:
+            alerts += 1
+
+    stream.subscribe_all_mids(on_mids)
+    started = time.perf_counter()
+    stream.start()
+    while not stream.finished.is_set():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0)  # let queued callbacks run
+    elapsed = time.perf_counter() - started
+    return {
+        'messages': stream.message_count,
+        'ticks': ticks,
+        'alerts': alerts,
+        'elapsed_seconds': elapsed,
+        'ticks_per_second': ticks / elapsed if elapsed else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Hyperliquid traffic through PriceAnalyzer")
+    parser.add_argument('paths', nargs='+', help="Segment files or a recording directory")
+    parser.add_argument('--coin', default='SOL')
+    parser.add_argument('--speed', type=float, default=0, help="Replay speed multiplier (0 = max)")
+    args = parser.parse_args()
+
+    paths = args.paths[0] if len(args.paths) == 1 else args.paths
+    result = asyncio.run(measure_replay(paths, args.coin, args.speed))
+    for key, value in result.items():
+        print(f"{key:>18}: {value:.2f}" if isinstance(value, float) else f"{key:>18}: {value}")
+
+if __name__ == "__main__":
+    main()